@@ -0,0 +1,142 @@
+"""接口基准测试：在临时 SQLite 数据库上回放合成语料
+
+依次测量添加文章、分页列表、更新内容、按URL查询四类接口的吞吐量和延迟分位数，
+结束时附上 /api/metrics 中的 SQL 语句统计。需要安装 httpx（fastapi.testclient 依赖）。
+
+用法:
+    python benchmarks/bench_api.py --essays 10000
+    python benchmarks/bench_api.py --essays 1000000 --output result.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+
+
+def make_batch(start: int, count: int):
+    return {
+        "essays": [
+            {
+                "title": f"文章 {i}",
+                "subtitle": "副标题",
+                "author": f"作者 {i % 100}",
+                "url": f"https://example.com/essays/{i}",
+                "content": f"第 {i} 篇文章的正文。" + "人工智能正在改变内容生产的方式。" * 40,
+                "entry_time": "2024-01-15 10:30:00",
+            }
+            for i in range(start, start + count)
+        ]
+    }
+
+
+def summarize(name: str, latencies, items: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+
+    def percentile(pct):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))] * 1000
+
+    return {
+        "operation": name,
+        "requests": len(latencies),
+        "items_per_sec": items / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+    }
+
+
+def timed(client_call, latencies):
+    start = time.perf_counter()
+    response = client_call()
+    latencies.append(time.perf_counter() - start)
+    response.raise_for_status()
+    return response
+
+
+def run(client, essays: int, batch_size: int, samples: int):
+    results = []
+    rng = random.Random(42)
+
+    latencies = []
+    start = time.perf_counter()
+    for offset in range(0, essays, batch_size):
+        batch = make_batch(offset, min(batch_size, essays - offset))
+        timed(lambda: client.post("/api/essays", json=batch), latencies)
+    results.append(summarize("ingest", latencies, essays, time.perf_counter() - start))
+
+    latencies = []
+    listed = 0
+    cursor = None
+    start = time.perf_counter()
+    while True:
+        params = {"limit": 1000, "fields": "id,title,url"}
+        if cursor is not None:
+            params["after_id"] = cursor
+        page = timed(lambda: client.get("/api/essays", params=params), latencies).json()
+        listed += page["count"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    results.append(summarize("list", latencies, listed, time.perf_counter() - start))
+
+    urls = [f"https://example.com/essays/{rng.randrange(essays)}" for _ in range(samples)]
+
+    latencies = []
+    start = time.perf_counter()
+    for i, url in enumerate(urls):
+        body = {"url": url, "content": f"更新后的正文 {i}。" + "内容" * 200}
+        timed(lambda: client.put("/api/essays/content", json=body), latencies)
+    results.append(summarize("update", latencies, samples, time.perf_counter() - start))
+
+    latencies = []
+    start = time.perf_counter()
+    for url in urls:
+        timed(lambda: client.get("/api/essays/by-url", params={"url": url}), latencies)
+    results.append(summarize("lookup", latencies, samples, time.perf_counter() - start))
+
+    sql_metrics = [
+        line for line in client.get("/api/metrics").text.splitlines()
+        if line.startswith(("essay_sql_statement_duration_seconds_count", "essay_db_sessions_opened_total"))
+    ]
+    return results, sql_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章管理接口基准测试")
+    parser.add_argument("--essays", type=int, default=10000, help="写入的文章数")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每次 POST 的文章数")
+    parser.add_argument("--samples", type=int, default=1000, help="更新和按URL查询的请求数")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 必须在导入 essay_manager 之前设置，应用启动时据此创建数据库
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from fastapi.testclient import TestClient
+        import essay_manager
+
+        with TestClient(essay_manager.app) as client:
+            results, sql_metrics = run(client, args.essays, args.batch_size, args.samples)
+        essay_manager.async_db.shutdown()
+
+    print(f"{args.essays} 篇文章")
+    print(f"{'operation':>10} {'requests':>9} {'items/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for result in results:
+        print(f"{result['operation']:>10} {result['requests']:>9} {result['items_per_sec']:>10.0f} "
+              f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f}")
+    print("\n".join(sql_metrics))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"essays": args.essays, "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""批量写入基准测试：对比逐条 add_essay 与 add_essays_bulk 的写入速度
+
+用法: python benchmarks/bench_bulk_ingest.py
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+from database import DatabaseManager
+
+BATCH_SIZES = [1, 100, 10000]
+
+
+def make_rows(count: int, prefix: str):
+    return [
+        {
+            "title": f"文章 {i}",
+            "url": f"https://example.com/{prefix}/{i}",
+            "subtitle": "副标题",
+            "author": "作者",
+            "content": "正文内容" * 200,
+            "entry_time": datetime.now(),
+        }
+        for i in range(count)
+    ]
+
+
+def bench(batch_size: int, bulk: bool) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        rows = make_rows(batch_size, "bulk" if bulk else "single")
+        start = time.perf_counter()
+        if bulk:
+            db.add_essays_bulk(rows)
+        else:
+            for row in rows:
+                db.add_essay(**row)
+        elapsed = time.perf_counter() - start
+        db.engine.dispose()
+        return batch_size / elapsed
+
+
+def main():
+    print(f"{'batch':>8} {'add_essay rows/s':>18} {'bulk rows/s':>14}")
+    for size in BATCH_SIZES:
+        single = bench(size, bulk=False)
+        bulk = bench(size, bulk=True)
+        print(f"{size:>8} {single:>18.0f} {bulk:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
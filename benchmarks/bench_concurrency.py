@@ -0,0 +1,92 @@
+"""并发基准测试：大批量写入进行时的读延迟
+
+在事件循环中同时运行一个大批量写入和若干并发读取，对比直接调用同步 DatabaseManager
+与通过 AsyncDatabaseManager 线程池访问时读请求的 p50/p99 延迟。
+
+用法: python benchmarks/bench_concurrency.py
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+from database import AsyncDatabaseManager, DatabaseManager
+
+SEED_ROWS = 10000
+WRITE_ROWS = 50000
+READERS = 8
+
+
+def make_rows(count: int, prefix: str):
+    return [
+        {
+            "title": f"文章 {i}",
+            "url": f"https://example.com/{prefix}/{i}",
+            "subtitle": "副标题",
+            "author": "作者",
+            "content": "正文内容" * 200,
+            "entry_time": datetime.now(),
+        }
+        for i in range(count)
+    ]
+
+
+def percentile(values, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run(db: DatabaseManager, use_async: bool):
+    async_db = AsyncDatabaseManager(db) if use_async else None
+    latencies = []
+    writing = True
+
+    async def writer():
+        nonlocal writing
+        rows = make_rows(WRITE_ROWS, f"write-{use_async}")
+        # 稍等片刻让读请求先开始
+        await asyncio.sleep(0.05)
+        if use_async:
+            await async_db.add_essays_bulk(rows)
+        else:
+            db.add_essays_bulk(rows)
+        writing = False
+
+    async def reader():
+        while writing:
+            url = f"https://example.com/seed/{random.randrange(SEED_ROWS)}"
+            start = time.perf_counter()
+            # 先让出事件循环，模拟请求排队等待调度，计入事件循环被阻塞的时间
+            await asyncio.sleep(0)
+            if use_async:
+                await async_db.get_essay_by_url(url)
+            else:
+                db.get_essay_by_url(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(writer(), *(reader() for _ in range(READERS)))
+    if async_db:
+        async_db.executor.shutdown(wait=True)
+    return latencies
+
+
+def main():
+    print(f"{'mode':>6} {'reads':>8} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for use_async in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            db.add_essays_bulk(make_rows(SEED_ROWS, "seed"))
+            latencies = asyncio.run(run(db, use_async))
+            db.engine.dispose()
+        mode = "async" if use_async else "sync"
+        print(f"{mode:>6} {len(latencies):>8} {statistics.median(latencies):>10.2f} "
+              f"{percentile(latencies, 99):>10.2f} {max(latencies):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
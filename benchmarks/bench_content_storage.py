@@ -0,0 +1,92 @@
+"""正文存储基准测试：明文存储与压缩去重存储的数据库大小
+
+用仓库中的文档段落拼出文章，其中一部分作为同一篇文章在多个镜像URL下重复出现，
+先以明文写入，再用 compress_existing_content 迁移，对比迁移前后的数据库大小。
+
+用法: python benchmarks/bench_content_storage.py
+"""
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+from sqlalchemy import text
+
+from database import DatabaseManager
+from manage_db import database_size
+
+ESSAYS = 20000
+# 每篇原创文章平均被转载到的镜像数
+MIRROR_RATE = 0.3
+PARAGRAPHS_PER_ESSAY = 12
+
+
+def load_paragraphs():
+    paragraphs = []
+    for name in ("README.md", "README_API.md", os.path.join("input", "musk.txt")):
+        with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+            paragraphs.extend(p.strip() for p in f.read().split("\n\n") if p.strip())
+    return paragraphs
+
+
+def make_rows(count: int):
+    rng = random.Random(42)
+    paragraphs = load_paragraphs()
+    rows = []
+    while len(rows) < count:
+        content = "\n\n".join(rng.choice(paragraphs) for _ in range(PARAGRAPHS_PER_ESSAY))
+        copies = 1 + (1 if rng.random() < MIRROR_RATE else 0)
+        for mirror in range(copies):
+            rows.append({
+                "title": f"文章 {len(rows)}",
+                "url": f"https://mirror{mirror}.example.com/{len(rows)}",
+                "content": content,
+                "entry_time": datetime.now(),
+            })
+    return rows[:count]
+
+
+def table_sizes(db: DatabaseManager) -> dict:
+    """按表统计占用的字节数（需要 SQLite 编译了 dbstat），全文索引的影子表合并计算"""
+    sizes = {}
+    try:
+        with db.engine.connect() as conn:
+            for name, size in conn.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")):
+                key = "essays_fts" if name.startswith("essays_fts") else name
+                sizes[key] = sizes.get(key, 0) + size
+    except Exception:
+        pass
+    return sizes
+
+
+def report(label: str, size: int, sizes: dict):
+    detail = ", ".join(
+        f"{name} {sizes[name] / 1024 / 1024:.1f} MB"
+        for name in ("essays", "essay_contents", "essays_fts") if name in sizes
+    )
+    print(f"{label}: {size / 1024 / 1024:.1f} MB ({detail})")
+
+
+def main():
+    rows = make_rows(ESSAYS)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        for start in range(0, len(rows), 5000):
+            db.add_essays_bulk(rows[start:start + 5000])
+        db.optimize_search_index()
+        db.vacuum()
+        before = database_size(db)
+        report(f"{ESSAYS} 篇文章，明文存储", before, table_sizes(db))
+        db.compress_existing_content()
+        db.vacuum()
+        after = database_size(db)
+        report("压缩去重存储", after, table_sizes(db))
+        db.engine.dispose()
+    print(f"数据库大小为原来的 {after / before:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""组提交基准测试：并发单篇写入的吞吐量
+
+大量并发请求各自调用 add_essay / update_essay_content，对比每个请求单独提交与
+GroupCommitWriter 合并提交时的写入 QPS。
+
+用法: python benchmarks/bench_group_commit.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+from database import AsyncDatabaseManager, DatabaseManager
+
+CLIENTS = 64
+REQUESTS_PER_CLIENT = 50
+
+
+async def run(async_db: AsyncDatabaseManager) -> float:
+    errors = 0
+
+    async def client(client_id: int):
+        nonlocal errors
+        for i in range(REQUESTS_PER_CLIENT):
+            url = f"https://example.com/{client_id}/{i}"
+            try:
+                await async_db.add_essay(
+                    title=f"文章 {client_id}-{i}", url=url, content="正文内容" * 200, entry_time=datetime.now()
+                )
+                await async_db.update_essay_content(url, "更新后的内容" * 200)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(CLIENTS)))
+    elapsed = time.perf_counter() - start
+    if errors:
+        print(f"  {errors} 个请求失败")
+    return CLIENTS * REQUESTS_PER_CLIENT * 2 / elapsed
+
+
+def main():
+    print(f"{'mode':>14} {'writes/s':>10}")
+    for group_commit in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            async_db = AsyncDatabaseManager(db, group_commit=group_commit)
+            qps = asyncio.run(run(async_db))
+            async_db.shutdown()
+        mode = "group commit" if group_commit else "per request"
+        print(f"{mode:>14} {qps:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,169 @@
+import asyncio
+import bisect
+import functools
+import hashlib
+import heapq
+import logging
 import os
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import bindparam, create_engine, event, func, inspect, insert, text, update, Column, Integer, String, DateTime, Text, LargeBinary
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import deferred, sessionmaker, undefer
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 Base = declarative_base()
 
+# 批量写入时每次 IN 查询/插入的行数，保持在 SQLite 绑定参数上限以内
+BULK_CHUNK_SIZE = 500
+
+ESSAY_FIELDS = ("title", "subtitle", "author", "url", "content", "entry_time")
+
+# 列表接口可返回的字段
+ESSAY_LIST_FIELDS = (
+    "id", "title", "subtitle", "author", "url", "content", "entry_time", "created_at", "revision", "updated_at"
+)
+
+# 流式读取时每批从 SQLite 取出的行数
+STREAM_BATCH_SIZE = 1000
+
+# 连接池大小，同时也是异步访问时线程池的线程数
+DB_POOL_SIZE = 8
+# 写锁被占用时等待的毫秒数，超时才报 "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+# 组提交：一次提交最多合并的写请求数，以及第一个请求最多等待的秒数
+GROUP_COMMIT_MAX_BATCH = 256
+GROUP_COMMIT_MAX_DELAY = 0.005
+
+# URL索引中未归并进排序数组的最近插入数上限，索引较大时按大小的 1/16 放宽
+URL_INDEX_BUFFER_SIZE = 4096
+
+# URL 规范化时去掉的跟踪参数
+TRACKING_QUERY_PARAMS = {
+    "fbclid", "gclid", "spm", "isappinstalled", "scene", "srcid",
+    "sharer_sharetime", "sharer_shareid", "share_source", "share_medium", "share_from",
+}
+TRACKING_QUERY_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+
+# 压缩存储正文时的 zlib 压缩级别
+CONTENT_COMPRESS_LEVEL = 6
+
+# 变更追踪：每次插入或修改文章时，由触发器从单行计数表取下一个修订号并更新 updated_at。
+# 计数只增不减，删除修订号最大的文章后也不会重复分配；删除文章同样推进计数，列表 ETag 随之变化。
+REVISION_TABLE = "essay_revision"
+NEXT_REVISION_SQL = f"""UPDATE {REVISION_TABLE} SET value = value + 1 WHERE id = 1;"""
+CURRENT_REVISION_SQL = f"(SELECT value FROM {REVISION_TABLE} WHERE id = 1)"
+NOW_SQL = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+REVISION_TRIGGERS = ("essays_revision_ai", "essays_revision_au", "essays_revision_ad")
+CHANGE_TRACKING_DDL = [
+    f"CREATE TABLE IF NOT EXISTS {REVISION_TABLE} (id INTEGER PRIMARY KEY CHECK (id = 1), value INTEGER NOT NULL)",
+    # 旧数据库补上修订号和更新时间
+    "UPDATE essays SET revision = id, updated_at = COALESCE(created_at, " + NOW_SQL + ") WHERE revision IS NULL",
+    f"INSERT OR IGNORE INTO {REVISION_TABLE}(id, value) VALUES (1, 0)",
+    # 计数不能小于已分配的修订号（旧版触发器按 MAX(revision) 分配）
+    f"UPDATE {REVISION_TABLE} SET value = MAX(value, (SELECT COALESCE(MAX(revision), 0) FROM essays)) WHERE id = 1",
+    # 旧版触发器按 MAX(revision) + 1 分配修订号，每次启动重建为当前版本
+    *(f"DROP TRIGGER IF EXISTS {trigger}" for trigger in REVISION_TRIGGERS),
+    f"""CREATE TRIGGER essays_revision_ai AFTER INSERT ON essays BEGIN
+        {NEXT_REVISION_SQL}
+        UPDATE essays SET revision = {CURRENT_REVISION_SQL}, updated_at = {NOW_SQL} WHERE id = new.id;
+    END""",
+    f"""CREATE TRIGGER essays_revision_au AFTER UPDATE OF title, subtitle, author, url, content, content_hash, entry_time ON essays BEGIN
+        {NEXT_REVISION_SQL}
+        UPDATE essays SET revision = {CURRENT_REVISION_SQL}, updated_at = {NOW_SQL} WHERE id = new.id;
+    END""",
+    f"""CREATE TRIGGER essays_revision_ad AFTER DELETE ON essays BEGIN
+        {NEXT_REVISION_SQL}
+    END""",
+]
+
+# 全文索引：无内容（contentless）FTS5 表只保存倒排索引，不保存正文副本，正文只在 essay_contents 中压缩存储一份。
+# trigram 分词对中文按三字切分，不依赖空格分词
+FTS_TABLE = "essays_fts"
+FTS_COLUMNS = ("title", "subtitle", "author", "content")
+# bm25 各列权重，与 FTS_COLUMNS 顺序一致
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+# trigram 分词只能索引长度不小于 3 的词，更短的词回退为 LIKE 扫描
+FTS_MIN_TERM_LENGTH = 3
+SNIPPET_LENGTH = 32
+ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+# SQLite 3.43 起无内容表支持按 rowid 删除，更早的版本需要用写入时的原值发出 'delete' 命令
+FTS_CONTENTLESS_DELETE = sqlite3.sqlite_version_info >= (3, 43, 0)
+CONTENTLESS_FTS_MARKER = "content=''"
+FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"title, subtitle, author, content, content='', tokenize='trigram'"
+    f"{', contentless_delete=1' if FTS_CONTENTLESS_DELETE else ''})"
+)
+# 索引由 DatabaseManager 的写入路径维护；支持按 rowid 删除时，其他客户端删除文章也由触发器同步
+FTS_DELETE_TRIGGER = f"""CREATE TRIGGER IF NOT EXISTS essays_fts_ad AFTER DELETE ON essays BEGIN
+    DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+END"""
+FTS_INSERT_SQL = (
+    f"INSERT INTO {FTS_TABLE}(rowid, title, subtitle, author, content) "
+    "VALUES (:id, :title, :subtitle, :author, :content)"
+)
+# 旧版索引的触发器，旧版索引是外部内容表或自带内容表
+FTS_TRIGGERS = ("essays_fts_ai", "essays_fts_ad", "essays_fts_au")
+LEGACY_VIEWS = ("essay_texts",)
+
+def normalize_url(url: str) -> str:
+    """规范化URL：scheme 和 host 转小写，去掉默认端口、路径末尾的斜杠和跟踪参数"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    default_port = DEFAULT_PORTS.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+    path = parts.path.rstrip("/")
+    if not path and netloc:
+        path = "/"
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_QUERY_PARAMS and not key.lower().startswith(TRACKING_QUERY_PREFIXES)
+    ])
+    return urlunsplit((scheme, netloc, path, query, parts.fragment))
+
+def content_digest(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def compress_content(content: str) -> Tuple[str, bytes, int]:
+    """压缩正文，返回 (sha256 哈希, 压缩数据, 原文字节数)"""
+    raw = content.encode("utf-8")
+    return content_digest(content), zlib.compress(raw, CONTENT_COMPRESS_LEVEL), len(raw)
+
+def decompress_content(data: Optional[bytes]) -> Optional[str]:
+    if data is None:
+        return None
+    return zlib.decompress(data).decode("utf-8")
+
+def parse_entry_time(value: Optional[str]) -> datetime:
+    """解析录入时间，依次尝试 ISO 格式和 "%Y-%m-%d %H:%M:%S"，都失败或为空时使用当前时间"""
+    if not value:
+        return datetime.now()
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return datetime.now()
+
 class Essay(Base):
     __tablename__ = "essays"
 
@@ -14,12 +172,113 @@ class Essay(Base):
     subtitle = Column(Text, nullable=True)
     author = Column(String(200), nullable=True)
     url = Column(Text, unique=True, nullable=False, index=True)
-    content = Column(Text, nullable=True)
+    # 正文按需加载，元数据查询不会读取正文
+    content = deferred(Column(Text, nullable=True))
+    # 压缩存储时正文在 essay_contents 表中，content 为空
+    content_hash = Column(String(64), nullable=True, index=True)
     entry_time = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # 由触发器维护：最近一次写入的全表修订号和时间（UTC）
+    revision = Column(Integer, nullable=True, index=True)
+    updated_at = Column(DateTime, nullable=True)
+
+class EssayContent(Base):
+    """压缩存储的文章正文，相同内容只保存一份"""
+    __tablename__ = "essay_contents"
+
+    hash = Column(String(64), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)
+
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    """每个新连接启用 WAL，读操作不再被写事务阻塞；注册 LIKE 搜索读取压缩正文使用的解压函数"""
+    dbapi_connection.create_function("content_decompress", 1, decompress_content, deterministic=True)
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    finally:
+        cursor.close()
+
+class UrlIndex:
+    """进程内URL成员索引
+
+    保存每个URL的 64 位 blake2b 摘要：已排序的 array('Q') 加上一个最近插入的小缓冲集合，
+    缓冲超过上限时归并进数组，每个URL约占 8 字节。
+    摘要不在索引中即可确定URL是新的，无需查询数据库；在索引中时可能是摘要碰撞，由调用方再查数据库确认。
+    插入后立即加入索引，即使事务随后回滚也只会多一次数据库确认，不会误判为新URL。
+    写线程和线程池会同时访问，所有读写和计数都在锁内进行。
+    """
+
+    def __init__(self, digests: Iterable[int] = ()):
+        self._sorted = array("Q", sorted(set(digests)))
+        self._recent = set()
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.definitely_new = 0
+        self.confirmed_hits = 0
+        self.false_positives = 0
+
+    @staticmethod
+    def digest(url: str) -> int:
+        return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def add(self, url: str):
+        digest = self.digest(url)
+        with self._lock:
+            if self._contains(digest):
+                return
+            self._recent.add(digest)
+            if len(self._recent) > max(URL_INDEX_BUFFER_SIZE, len(self._sorted) // 16):
+                self._sorted = array("Q", heapq.merge(self._sorted, sorted(self._recent)))
+                self._recent = set()
+
+    def _contains(self, digest: int) -> bool:
+        if digest in self._recent:
+            return True
+        position = bisect.bisect_left(self._sorted, digest)
+        return position < len(self._sorted) and self._sorted[position] == digest
+
+    def might_contain(self, url: str) -> bool:
+        digest = self.digest(url)
+        with self._lock:
+            self.lookups += 1
+            if self._contains(digest):
+                return True
+            self.definitely_new += 1
+            return False
+
+    def record_hit(self, exists: bool):
+        """记录一次可能命中经数据库确认后的结果"""
+        with self._lock:
+            if exists:
+                self.confirmed_hits += 1
+            else:
+                self.false_positives += 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sorted) + len(self._recent)
+
+    def stats(self) -> dict:
+        with self._lock:
+            # 排序数组按 8 字节存放摘要，缓冲集合另算每个摘要整数对象的大小
+            memory_bytes = (sys.getsizeof(self._sorted) + sys.getsizeof(self._recent)
+                            + len(self._recent) * sys.getsizeof(2 ** 63))
+            return {
+                "size": len(self._sorted) + len(self._recent),
+                "memory_bytes": memory_bytes,
+                "lookups": self.lookups,
+                "definitely_new": self.definitely_new,
+                "confirmed_hits": self.confirmed_hits,
+                "false_positives": self.false_positives,
+                "short_circuit_rate": self.definitely_new / self.lookups if self.lookups else 0.0,
+            }
 
 class DatabaseManager:
-    def __init__(self, database_url: str = None):
+    def __init__(self, database_url: str = None, url_index: bool = True, normalize_urls: bool = False,
+                 compress_content: bool = False):
         if database_url is None:
             # 使用绝对路径确保数据库文件能被找到
             current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -27,66 +286,716 @@ class DatabaseManager:
             db_path = os.path.join(parent_dir, "local_db", "essays.db")
             database_url = f"sqlite:///{db_path}"
 
-        self.engine = create_engine(database_url, connect_args={"check_same_thread": False})
+        self.engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            pool_size=DB_POOL_SIZE
+        )
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", _configure_sqlite_connection)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.sessions_opened = 0
+        self._sessions_lock = threading.Lock()
+        self.normalize_urls = normalize_urls
+        self.compress_content = compress_content
         self.create_tables()
+        self.url_index = self.build_url_index() if url_index else None
 
     def create_tables(self):
         Base.metadata.create_all(bind=self.engine)
+        self.migrate_columns()
+        if self.engine.dialect.name == "sqlite":
+            with self.engine.begin() as conn:
+                for view in LEGACY_VIEWS:
+                    conn.execute(text(f"DROP VIEW IF EXISTS {view}"))
+                for statement in CHANGE_TRACKING_DDL:
+                    conn.execute(text(statement))
+        self.fts_enabled = self.create_search_index()
+
+    def migrate_columns(self):
+        """为旧数据库的 essays 表补上新增的列和索引"""
+        table = Essay.__table__
+        existing = {column["name"] for column in inspect(self.engine).get_columns(table.name)}
+        with self.engine.begin() as conn:
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+        for index in table.indexes:
+            index.create(bind=self.engine, checkfirst=True)
+
+    def create_search_index(self) -> bool:
+        """创建无内容全文索引表，新建索引时自动回填已有文章
+
+        非 SQLite 数据库或 SQLite 未编译 FTS5/trigram 时返回 False，搜索回退为 LIKE 扫描。
+        """
+        self.fts_contentless_delete = False
+        if self.engine.dialect.name != "sqlite":
+            return False
+        try:
+            with self.engine.begin() as conn:
+                existing_sql = conn.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": FTS_TABLE}
+                ).scalar()
+                existed = existing_sql is not None
+                # 旧版索引由触发器维护，新版索引只由本程序的写入路径维护
+                for trigger in FTS_TRIGGERS:
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+                if existed and CONTENTLESS_FTS_MARKER not in existing_sql:
+                    # 旧版外部内容或自带内容的索引，重建为无内容索引
+                    conn.execute(text(f"DROP TABLE {FTS_TABLE}"))
+                    existed = False
+                conn.execute(text(FTS_DDL))
+                table_sql = conn.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": FTS_TABLE}
+                ).scalar()
+                self.fts_contentless_delete = "contentless_delete=1" in table_sql
+                if self.fts_contentless_delete:
+                    conn.execute(text(FTS_DELETE_TRIGGER))
+                if not existed:
+                    self._fill_search_index(conn)
+            return True
+        except OperationalError as e:
+            logger.warning("全文索引不可用，搜索将使用 LIKE 扫描: %s", e)
+            return False
+
+    def rebuild_search_index(self):
+        """根据 essays 表重建全文索引"""
+        if not self.fts_enabled:
+            raise RuntimeError("全文索引不可用")
+        with self.engine.begin() as conn:
+            self._fill_search_index(conn)
+
+    def _fill_search_index(self, conn):
+        """清空全文索引后写入所有文章，压缩存储的正文在 Python 中解压"""
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')"))
+        conn.execute(text(
+            f"INSERT INTO {FTS_TABLE}(rowid, title, subtitle, author, content) "
+            "SELECT id, title, subtitle, author, content FROM essays WHERE content_hash IS NULL"
+        ))
+        result = conn.execution_options(yield_per=STREAM_BATCH_SIZE).execute(text(
+            "SELECT e.id, e.title, e.subtitle, e.author, c.data FROM essays e "
+            "LEFT JOIN essay_contents c ON c.hash = e.content_hash WHERE e.content_hash IS NOT NULL"
+        ))
+        for rows in result.partitions():
+            conn.execute(text(FTS_INSERT_SQL), [
+                {"id": essay_id, "title": title, "subtitle": subtitle, "author": author,
+                 "content": decompress_content(data) if data is not None else None}
+                for essay_id, title, subtitle, author, data in rows
+            ])
+
+    def _index_essays(self, session, essays: List[dict]):
+        """把文章写入全文索引，essays 为包含 id 和 FTS_COLUMNS 各列原文的字典列表"""
+        if self.fts_enabled and essays:
+            session.execute(text(FTS_INSERT_SQL), essays)
+
+    def _unindex_essay(self, session, essay: dict):
+        """从全文索引删除文章
+
+        不支持按 rowid 删除时，无内容表要求 essay 给出写入索引时的各列原值。
+        """
+        if not self.fts_enabled:
+            return
+        if self.fts_contentless_delete:
+            session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), essay)
+        else:
+            session.execute(text(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, subtitle, author, content) "
+                "VALUES ('delete', :id, :title, :subtitle, :author, :content)"
+            ), essay)
+
+    def optimize_search_index(self):
+        """合并全文索引的所有段"""
+        with self.engine.begin() as conn:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+
+    def build_url_index(self) -> UrlIndex:
+        """从数据库加载所有URL构建成员索引"""
+        digests = array("Q")
+        session = self.get_session()
+        try:
+            for (url,) in session.query(Essay.url).yield_per(STREAM_BATCH_SIZE * 10):
+                digests.append(UrlIndex.digest(self.normalize(url)))
+        finally:
+            session.close()
+        return UrlIndex(digests)
 
     def get_session(self):
+        # 线程池和写线程会同时打开会话，计数需要加锁
+        with self._sessions_lock:
+            self.sessions_opened += 1
         return self.SessionLocal()
 
+    def normalize(self, url: str) -> str:
+        """启用 normalize_urls 时返回规范化后的URL，否则原样返回"""
+        return normalize_url(url) if self.normalize_urls else url
+
+    def _url_variants(self, url: str) -> List[str]:
+        """查找文章时依次使用的URL：规范化后的URL，以及与之不同的原URL
+
+        开启 normalize_urls 之前存储的URL没有规范化，按原URL仍能找到。
+        """
+        normalized = self.normalize(url)
+        return [normalized] if normalized == url else [normalized, url]
+
+    def _find_essay(self, query, url: str):
+        """按 _url_variants 查找文章，优先返回规范化URL对应的文章"""
+        variants = self._url_variants(url)
+        if len(variants) == 1:
+            return query.filter(Essay.url == variants[0]).first()
+        return query.filter(Essay.url.in_(variants)).order_by((Essay.url == variants[0]).desc()).first()
+
     def essay_exists(self, url: str) -> bool:
         session = self.get_session()
         try:
-            return session.query(Essay).filter(Essay.url == url).first() is not None
+            return self._url_exists(session, url)
         finally:
             session.close()
 
-    def add_essay(self, title: str, url: str, subtitle: str = None, author: str = None, content: str = None, entry_time: datetime = None) -> bool:
-        if self.essay_exists(url):
+    def _url_exists(self, session, url: str) -> bool:
+        """URL索引确定是新URL时直接返回，否则按规范化URL和原URL查询数据库"""
+        variants = self._url_variants(url)
+        if self.url_index is not None and not self.url_index.might_contain(variants[0]):
             return False
+        exists = session.query(Essay.id).filter(Essay.url.in_(variants)).first() is not None
+        if self.url_index is not None:
+            self.url_index.record_hit(exists)
+        return exists
 
+    def run_in_transaction(self, func, *args, **kwargs):
+        """在新会话中执行 func(session, ...) 并提交，出错时回滚"""
         session = self.get_session()
         try:
-            essay = Essay(
-                title=title,
-                subtitle=subtitle,
-                author=author,
-                url=url,
-                content=content,
-                entry_time=entry_time
-            )
-            session.add(essay)
+            result = func(session, *args, **kwargs)
             session.commit()
-            return True
+            return result
         except Exception as e:
             session.rollback()
             raise e
         finally:
             session.close()
 
+    def add_essay(self, title: str, url: str, subtitle: str = None, author: str = None, content: str = None, entry_time: datetime = None) -> bool:
+        return self.run_in_transaction(
+            self._add_essay, title=title, url=url, subtitle=subtitle, author=author, content=content, entry_time=entry_time
+        )
+
+    def add_essays_bulk(self, essays: List[dict], chunk_size: int = BULK_CHUNK_SIZE) -> List[bool]:
+        """批量添加文章，在一个事务内完成
+
+        先在批次内部按URL去重，再按块用一次 IN 查询排除数据库中已存在的URL。
+        返回与输入顺序一致的列表，True 表示插入成功，False 表示URL重复被跳过。
+        开启URL规范化时，行中已有的 normalized_url 直接使用，不再重复规范化。
+        """
+        return self.run_in_transaction(self._add_essays_bulk, essays, chunk_size)
+
     def update_essay_content(self, url: str, content: str) -> bool:
         """更新文章内容"""
+        return self.run_in_transaction(self._update_essay_content, url, content)
+
+    def _add_essay(self, session, title: str, url: str, subtitle: str = None, author: str = None, content: str = None, entry_time: datetime = None) -> bool:
+        if self._url_exists(session, url):
+            return False
+        url = self.normalize(url)
+
+        stored = self._store_content(session, content)
+        # 其他进程可能已插入同一URL而本进程的索引并不知道，冲突时按重复跳过
+        essay_id = session.execute(
+            self._insert_essays().values(
+                title=title,
+                subtitle=subtitle,
+                author=author,
+                url=url,
+                entry_time=entry_time,
+                **stored
+            ).returning(Essay.id)
+        ).scalar()
+        if self.url_index is not None:
+            self.url_index.add(url)
+        if essay_id is None:
+            if stored["content_hash"]:
+                self._delete_unused_content(session, stored["content_hash"])
+            return False
+        self._index_essays(session, [
+            {"id": essay_id, "title": title, "subtitle": subtitle, "author": author, "content": content}
+        ])
+        return True
+
+    def _add_essays_bulk(self, session, essays: List[dict], chunk_size: int = BULK_CHUNK_SIZE) -> List[bool]:
+        results = [False] * len(essays)
+        seen = set()
+        for start in range(0, len(essays), chunk_size):
+            chunk = essays[start:start + chunk_size]
+            # 离线导入在解析进程中已规范化URL，放在 normalized_url 中
+            chunk_urls = [
+                essay["normalized_url"] if self.normalize_urls and "normalized_url" in essay
+                else self.normalize(essay["url"])
+                for essay in chunk
+            ]
+            # 只有URL索引判断可能已存在的URL才需要查询数据库
+            candidates = {url for url in chunk_urls if url not in seen}
+            if self.url_index is not None:
+                candidates = {url for url in candidates if self.url_index.might_contain(url)}
+            existing = set()
+            if candidates:
+                # 存储的URL -> 规范化URL，同时查找未规范化的旧URL
+                lookup = {url: url for url in candidates}
+                for essay, url in zip(chunk, chunk_urls):
+                    if url in candidates:
+                        lookup.setdefault(essay["url"], url)
+                existing = {
+                    lookup[row[0]] for row in session.query(Essay.url).filter(Essay.url.in_(lookup))
+                }
+                if self.url_index is not None:
+                    for url in candidates:
+                        self.url_index.record_hit(url in existing)
+
+            rows = []
+            positions = []
+            contents = {}
+            entries = {}
+            for offset, (essay, url) in enumerate(zip(chunk, chunk_urls)):
+                if url in seen or url in existing:
+                    continue
+                seen.add(url)
+                row = {field: essay.get(field) for field in ESSAY_FIELDS}
+                row["url"] = url
+                row["content_hash"] = None
+                # 全文索引写入原文，压缩前记录
+                entries[url] = {column: row[column] for column in FTS_COLUMNS}
+                if self.compress_content and row["content"] is not None:
+                    digest, data, size = compress_content(row["content"])
+                    contents[digest] = {"hash": digest, "data": data, "size": size}
+                    row["content"], row["content_hash"] = None, digest
+                rows.append(row)
+                positions.append(start + offset)
+
+            if contents:
+                session.execute(insert(EssayContent.__table__).prefix_with("OR IGNORE"), list(contents.values()))
+            if rows:
+                # 索引过期时查询之后仍可能有其他进程插入的URL，冲突的行按重复跳过
+                inserted = {
+                    url: essay_id
+                    for essay_id, url in session.execute(self._insert_essays().returning(Essay.id, Essay.url), rows)
+                }
+                self._index_essays(session, [
+                    {"id": essay_id, **entries[url]} for url, essay_id in inserted.items()
+                ])
+                for position, row in zip(positions, rows):
+                    results[position] = row["url"] in inserted
+                    if self.url_index is not None:
+                        self.url_index.add(row["url"])
+                    if row["url"] not in inserted and row["content_hash"]:
+                        self._delete_unused_content(session, row["content_hash"])
+        return results
+
+    @staticmethod
+    def _insert_essays():
+        """插入文章的语句，URL已存在的行不插入也不报错"""
+        return sqlite_insert(Essay).on_conflict_do_nothing(index_elements=[Essay.url])
+
+    def _update_essay_content(self, session, url: str, content: str) -> bool:
+        essay = self._find_essay(session.query(Essay), url)
+        if essay:
+            # 内容没有变化时不写入，修订号也保持不变
+            if essay.content_hash is not None:
+                unchanged = content is not None and content_digest(content) == essay.content_hash
+            else:
+                unchanged = content == essay.content
+            if unchanged:
+                return True
+            old_hash = essay.content_hash
+            entry = {"id": essay.id, "title": essay.title, "subtitle": essay.subtitle, "author": essay.author}
+            if self.fts_enabled:
+                if not self.fts_contentless_delete:
+                    # 不支持按 rowid 删除时要用写入索引时的原文删除旧条目
+                    entry["content"] = self._load_content(session, essay)
+                self._unindex_essay(session, entry)
+            for key, value in self._store_content(session, content).items():
+                setattr(essay, key, value)
+            session.flush()
+            self._index_essays(session, [{**entry, "content": content}])
+            if old_hash and old_hash != essay.content_hash:
+                self._delete_unused_content(session, old_hash)
+            return True
+        return False
+
+    def _store_content(self, session, content: Optional[str]) -> dict:
+        """按存储模式写入正文，返回 essays 表中 content/content_hash 两列的值"""
+        if content is None or not self.compress_content:
+            return {"content": content, "content_hash": None}
+        digest, data, size = compress_content(content)
+        session.execute(
+            insert(EssayContent.__table__).prefix_with("OR IGNORE"),
+            {"hash": digest, "data": data, "size": size}
+        )
+        return {"content": None, "content_hash": digest}
+
+    @staticmethod
+    def _load_content(session, essay: Essay) -> Optional[str]:
+        """读取文章正文，压缩存储的正文解压后返回"""
+        if essay.content_hash is None:
+            return essay.content
+        stored = session.get(EssayContent, essay.content_hash)
+        return decompress_content(stored.data) if stored is not None else None
+
+    def _delete_unused_content(self, session, content_hash: str):
+        """删除已没有文章引用的压缩正文"""
+        session.execute(
+            text("DELETE FROM essay_contents WHERE hash = :hash "
+                 "AND NOT EXISTS (SELECT 1 FROM essays WHERE content_hash = :hash)"),
+            {"hash": content_hash}
+        )
+
+    def compress_existing_content(self, batch_size: int = STREAM_BATCH_SIZE) -> int:
+        """把已有文章的明文正文迁移为压缩存储，每批一个事务，返回迁移的文章数
+
+        正文内容没有变化，迁移后恢复每篇文章原来的修订号和更新时间，增量同步和 ETag 不受影响。
+        """
+        migrated = 0
+        while True:
+            session = self.get_session()
+            try:
+                rows = session.query(Essay.id, Essay.content, Essay.revision, Essay.updated_at).filter(
+                    Essay.content.isnot(None), Essay.content_hash.is_(None)
+                ).order_by(Essay.id).limit(batch_size).all()
+                if not rows:
+                    break
+                contents = {}
+                updates = []
+                revisions = []
+                sequence = session.execute(text(f"SELECT {CURRENT_REVISION_SQL}")).scalar()
+                for essay_id, content, revision, updated_at in rows:
+                    digest, data, size = compress_content(content)
+                    contents[digest] = {"hash": digest, "data": data, "size": size}
+                    updates.append({"essay_id": essay_id, "content_hash": digest})
+                    revisions.append({"id": essay_id, "revision": revision, "updated_at": updated_at})
+                session.execute(insert(EssayContent.__table__).prefix_with("OR IGNORE"), list(contents.values()))
+                session.execute(
+                    text("UPDATE essays SET content = NULL, content_hash = :content_hash WHERE id = :essay_id"),
+                    updates
+                )
+                # 修订号触发器会为迁移的文章分配新修订号，改回原值
+                session.execute(update(Essay), revisions)
+                session.execute(text(f"UPDATE {REVISION_TABLE} SET value = :value WHERE id = 1"), {"value": sequence})
+                session.commit()
+                migrated += len(rows)
+            except Exception as e:
+                session.rollback()
+                raise e
+            finally:
+                session.close()
+        return migrated
+
+    def vacuum(self):
+        """回收空闲页，缩小数据库文件"""
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+            # WAL 模式下 VACUUM 的结果先写入 WAL 文件，检查点后才写回数据库文件
+            conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+
+    def get_essay_by_url(self, url: str, with_content: bool = True):
+        """根据URL获取文章，with_content 为 False 时不加载正文"""
         session = self.get_session()
         try:
-            essay = session.query(Essay).filter(Essay.url == url).first()
-            if essay:
-                essay.content = content
-                session.commit()
-                return True
-            return False
-        except Exception as e:
-            session.rollback()
-            raise e
+            query = session.query(Essay)
+            if with_content:
+                query = query.options(undefer(Essay.content))
+            essay = self._find_essay(query, url)
+            if essay is not None and with_content and essay.content_hash:
+                stored = session.get(EssayContent, essay.content_hash)
+                if stored is not None:
+                    set_committed_value(essay, "content", decompress_content(stored.data))
+            return essay
+        finally:
+            session.close()
+
+    def iter_essays(self, fields: Sequence[str] = ESSAY_LIST_FIELDS, after_id: int = None, limit: int = None,
+                    since_revision: int = None, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[dict]:
+        """按 id 升序逐批读取文章，只查询 fields 指定的列
+
+        after_id 为游标，只返回 id 大于它的文章；指定 since_revision 时改为按修订号升序，
+        只返回修订号大于它的文章。时间字段转换为 ISO 格式字符串。
+        """
+        columns = [getattr(Essay, field) for field in fields]
+        # 请求正文时连带取出压缩正文，在 Python 中解压
+        load_content = "content" in fields
+        if load_content:
+            columns.append(EssayContent.data)
+        session = self.get_session()
+        try:
+            query = session.query(*columns)
+            if load_content:
+                query = query.outerjoin(EssayContent, EssayContent.hash == Essay.content_hash)
+            if since_revision is not None:
+                query = query.filter(Essay.revision > since_revision).order_by(Essay.revision)
+            else:
+                query = query.order_by(Essay.id)
+            if after_id is not None:
+                query = query.filter(Essay.id > after_id)
+            if limit is not None:
+                query = query.limit(limit)
+            for row in query.yield_per(batch_size):
+                if load_content:
+                    *row, data = row
+                    if data is not None:
+                        row[fields.index("content")] = decompress_content(data)
+                essay = {}
+                for field, value in zip(fields, row):
+                    essay[field] = value.isoformat() if isinstance(value, datetime) else value
+                yield essay
         finally:
             session.close()
 
-    def get_essay_by_url(self, url: str):
-        """根据URL获取文章"""
+    def latest_revision(self) -> int:
+        """当前修订号，每次插入、修改、删除文章都会增加，没有写入过时为 0"""
         session = self.get_session()
         try:
-            return session.query(Essay).filter(Essay.url == url).first()
+            if self.engine.dialect.name == "sqlite":
+                return session.execute(text(f"SELECT {CURRENT_REVISION_SQL}")).scalar() or 0
+            return session.query(func.max(Essay.revision)).scalar() or 0
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+
+    def search_essays(self, query: str, limit: int = 20) -> List[dict]:
+        """全文搜索文章，按 bm25 相关度排序并返回命中片段
+
+        搜索词以空格分隔，所有词都需命中。
+        """
+        terms = query.split()
+        if not terms:
+            return []
+
+        fields = "e.id, e.title, e.subtitle, e.author, e.url"
+        contents_join = "LEFT JOIN essay_contents c ON c.hash = e.content_hash"
+        # 短词过滤在 SQL 中进行，压缩存储的正文逐篇解压；正文放在最后，标题等列命中时不必解压
+        searched = ("e.title", "e.subtitle", "e.author", "COALESCE(e.content, content_decompress(c.data))")
+        long_terms = [term for term in terms if len(term) >= FTS_MIN_TERM_LENGTH]
+        short_terms = [term for term in terms if len(term) < FTS_MIN_TERM_LENGTH]
+        params = {"limit": limit}
+        if self.fts_enabled and long_terms:
+            # 长词走 trigram 索引，短词只在索引命中的文章中按 LIKE 过滤
+            params["match"] = " ".join('"' + term.replace('"', '""') + '"' for term in long_terms)
+            conditions = [f"{FTS_TABLE} MATCH :match"] + _like_conditions(searched, short_terms, params)
+            weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+            sql = text(f"""
+                SELECT {fields}, bm25({FTS_TABLE}, {weights}) AS score
+                FROM {FTS_TABLE} JOIN essays e ON e.id = {FTS_TABLE}.rowid
+                {contents_join if short_terms else ""}
+                WHERE {" AND ".join(conditions)}
+                ORDER BY score
+                LIMIT :limit
+            """)
+        else:
+            # 全是短词或没有全文索引时按 LIKE 扫描 essays 表
+            sql = text(f"""
+                SELECT {fields}, NULL AS score
+                FROM essays e {contents_join}
+                WHERE {" AND ".join(_like_conditions(searched, terms, params))}
+                ORDER BY e.id DESC
+                LIMIT :limit
+            """)
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(sql, params).mappings().all()
+            # 无内容索引不能生成 snippet，只解压返回的文章正文，在 Python 中截取片段
+            contents = {}
+            if rows:
+                contents = {
+                    essay_id: content if data is None else decompress_content(data)
+                    for essay_id, content, data in conn.execute(
+                        text(f"SELECT e.id, e.content, c.data FROM essays e {contents_join} WHERE e.id IN :ids")
+                        .bindparams(bindparam("ids", expanding=True)),
+                        {"ids": [row["id"] for row in rows]}
+                    )
+                }
+
+        results = []
+        for row in rows:
+            result = {key: row[key] for key in ("id", "title", "subtitle", "author", "url", "score")}
+            result["snippet"] = _make_snippet({**result, "content": contents.get(row["id"])}, long_terms + short_terms)
+            results.append(result)
+        return results
+
+
+def _like_conditions(columns: Sequence[str], terms: List[str], params: dict) -> List[str]:
+    """每个词在任一列表达式中出现的 LIKE 条件，参数写入 params"""
+    conditions = []
+    for i, term in enumerate(terms):
+        params[f"term{i}"] = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        matches = " OR ".join(f"{column} LIKE :term{i} ESCAPE '\\'" for column in columns)
+        conditions.append(f"({matches})")
+    return conditions
+
+def _fold_case(value: str) -> str:
+    """大小写不敏感比较用的副本，与原文等长，找到的位置可直接用于截取原文"""
+    folded = value.casefold()
+    if len(folded) == len(value):
+        return folded
+    # 个别字符折叠后长度会变（如 ß -> ss），此时只折叠 ASCII，与 SQLite 的 LIKE 一致
+    return value.translate(ASCII_LOWER)
+
+
+def _make_snippet(row, terms: Sequence[str]) -> str:
+    """在命中的列中截取第一个找到的搜索词附近的文本，格式与 FTS5 snippet 一致
+
+    与 LIKE 一样不区分大小写，标出的命中词保留原文的大小写。
+    """
+    for term in terms:
+        folded_term = _fold_case(term)
+        for column in ("content", "subtitle", "title", "author"):
+            value = row[column] or ""
+            position = _fold_case(value).find(folded_term)
+            if position < 0:
+                continue
+            match_end = position + len(term)
+            start = max(0, position - SNIPPET_LENGTH // 2)
+            end = min(len(value), match_end + SNIPPET_LENGTH // 2)
+            prefix = "..." if start > 0 else ""
+            suffix = "..." if end < len(value) else ""
+            return prefix + value[start:position] + "[" + value[position:match_end] + "]" + value[match_end:end] + suffix
+    return ""
+
+
+class GroupCommitWriter:
+    """单写线程组提交
+
+    各处理函数提交的写操作进入队列，由唯一的写线程按批取出，在同一个事务中执行后一次提交，
+    每批最多 max_batch_size 个请求。队列中只有一个请求时立即提交；
+    有多个请求排队说明写入并发，此时再最多等待 max_delay 秒收集后续请求。
+    写操作形如 func(session, ...)，每个请求通过各自的 Future 拿到自己的返回值或异常。
+    批量提交失败时回滚，并逐个请求单独重试，只让出错的请求失败。
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_manager: DatabaseManager, max_batch_size: int = GROUP_COMMIT_MAX_BATCH,
+                 max_delay: float = GROUP_COMMIT_MAX_DELAY):
+        self.db = db_manager
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="essay-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        future = Future()
+        self.queue.put((future, func, args, kwargs))
+        return future
+
+    def close(self):
+        """处理完队列中已有的请求后停止写线程"""
+        self.queue.put(self._STOP)
+        self.thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is self._STOP:
+                break
+            batch = [item]
+            # 先取出已经排队的请求；没有其他请求排队时立即提交，有并发写入时才等待后续请求
+            deadline = None
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic() if deadline is not None else 0
+                try:
+                    item = self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    if deadline is None and len(batch) > 1:
+                        deadline = time.monotonic() + self.max_delay
+                        continue
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._commit_batch(batch)
+            except Exception as e:
+                # 写线程退出后所有写请求都会挂起，任何异常都只让本批请求失败
+                logger.exception("组提交写线程处理批次时出错")
+                for future, _, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit_batch(self, batch):
+        # 标记为运行中后调用方无法再取消；已取消的请求不执行
+        batch = [item for item in batch if item[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = self.db.run_in_transaction(
+                lambda session: [func(session, *args, **kwargs) for _, func, args, kwargs in batch]
+            )
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][0].set_exception(e)
+                return
+            for future, func, args, kwargs in batch:
+                try:
+                    future.set_result(self.db.run_in_transaction(func, *args, **kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+
+        for (future, _, _, _), result in zip(batch, results):
+            future.set_result(result)
+
+
+class AsyncDatabaseManager:
+    """DatabaseManager 的异步包装
+
+    所有数据库操作都在有界线程池中执行，async 接口中调用不会阻塞事件循环。
+    线程数与连接池大小一致，避免线程等待连接。
+    group_commit 为 True 时写操作交给 GroupCommitWriter 合并提交。
+    """
+
+    def __init__(self, db_manager: DatabaseManager = None, max_workers: int = DB_POOL_SIZE,
+                 group_commit: bool = True):
+        self.db = db_manager or DatabaseManager()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="essay-db")
+        self.writer = GroupCommitWriter(self.db) if group_commit else None
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def _write(self, func, *args, **kwargs):
+        """执行写操作 func(session, ...)，启用组提交时进入写队列"""
+        if self.writer is None:
+            return await self._run(self.db.run_in_transaction, func, *args, **kwargs)
+        return await asyncio.wrap_future(self.writer.submit(func, *args, **kwargs))
+
+    async def essay_exists(self, url: str) -> bool:
+        return await self._run(self.db.essay_exists, url)
+
+    async def add_essay(self, **kwargs) -> bool:
+        return await self._write(self.db._add_essay, **kwargs)
+
+    async def add_essays_bulk(self, essays: List[dict], chunk_size: int = BULK_CHUNK_SIZE) -> List[bool]:
+        return await self._write(self.db._add_essays_bulk, essays, chunk_size)
+
+    async def update_essay_content(self, url: str, content: str) -> bool:
+        return await self._write(self.db._update_essay_content, url, content)
+
+    async def get_essay_by_url(self, url: str, with_content: bool = True):
+        return await self._run(self.db.get_essay_by_url, url, with_content)
+
+    async def list_essays(self, **kwargs) -> List[dict]:
+        """一次性读取 iter_essays 的全部结果"""
+        return await self._run(lambda: list(self.db.iter_essays(**kwargs)))
+
+    async def latest_revision(self) -> int:
+        return await self._run(self.db.latest_revision)
+
+    async def search_essays(self, query: str, limit: int = 20) -> List[dict]:
+        return await self._run(self.db.search_essays, query, limit)
+
+    def shutdown(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.executor.shutdown(wait=True)
+        self.db.engine.dispose()
@@ -1,15 +1,94 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
+import hashlib
+import json
+import logging
 import sys
+import threading
+import time
 import os
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from database import DatabaseManager
+from database import AsyncDatabaseManager, DatabaseManager, ESSAY_LIST_FIELDS, parse_entry_time
+from metrics import CONTENT_UPDATES, HTTP_REQUEST_DURATION, INGEST_ESSAYS, REGISTRY, instrument_database
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="文章管理系统", description="管理文章信息的API接口")
-db_manager = DatabaseManager()
+
+def env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+# NORMALIZE_URLS=true 时按规范化后的URL去重（忽略 scheme/host 大小写、末尾斜杠和跟踪参数）
+# COMPRESS_CONTENT=true 时正文压缩后按内容哈希去重存储
+# DATABASE_URL 未设置时使用 local_db/essays.db
+db_manager = DatabaseManager(
+    os.getenv("DATABASE_URL"),
+    normalize_urls=env_flag("NORMALIZE_URLS"),
+    compress_content=env_flag("COMPRESS_CONTENT")
+)
+# 处理函数通过线程池访问数据库，避免阻塞事件循环
+async_db = AsyncDatabaseManager(db_manager)
+instrument_database(db_manager)
+
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    """按路由模板记录每个接口的处理耗时"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            path=route.path if route is not None else "unmatched",
+            status=status
+        )
+
+# 分页查询单页最多返回的文章数
+MAX_PAGE_SIZE = 1000
+
+# 同时进行的 NDJSON 流式导出数。每个流在整个传输期间占用一个数据库连接，且不经过有界线程池，
+# 限制并发数给其他请求留出连接池（8 个连接，另可溢出 10 个）
+MAX_CONCURRENT_STREAMS = 4
+stream_slots = threading.BoundedSemaphore(MAX_CONCURRENT_STREAMS)
+
+class LimitedStream:
+    """包装流式导出的迭代器，结束、出错或被丢弃时关闭迭代器并归还并发名额"""
+
+    def __init__(self, iterator, slots: threading.BoundedSemaphore):
+        self.iterator = iterator
+        self.slots = slots
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.iterator)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            try:
+                self.iterator.close()
+            finally:
+                self.slots.release()
+
+    def __del__(self):
+        # 客户端断开时 Starlette 不会关闭迭代器，对象回收时归还名额
+        self.close()
 
 class EssayData(BaseModel):
     title: str
@@ -46,39 +125,40 @@ async def add_essays(request: EssayRequest):
     successful_titles = []
     skipped_titles = []
 
-    for essay in request.essays:
-        # 解析录入时间
-        entry_time = None
-        if essay.entry_time:
-            try:
-                entry_time = datetime.fromisoformat(essay.entry_time.replace('Z', '+00:00'))
-            except ValueError:
-                try:
-                    entry_time = datetime.strptime(essay.entry_time, "%Y-%m-%d %H:%M:%S")
-                except ValueError:
-                    entry_time = datetime.now()
-        else:
-            entry_time = datetime.now()
-
-        # 尝试添加文章
-        try:
-            success = db_manager.add_essay(
-                title=essay.title,
-                url=essay.url,
-                subtitle=essay.subtitle,
-                author=essay.author,
-                content=essay.content,
-                entry_time=entry_time
-            )
+    rows = [
+        {
+            "title": essay.title,
+            "url": essay.url,
+            "subtitle": essay.subtitle,
+            "author": essay.author,
+            "content": essay.content,
+            "entry_time": parse_entry_time(essay.entry_time),
+        }
+        for essay in request.essays
+    ]
 
-            if success:
-                successful_titles.append(essay.title)
-            else:
-                skipped_titles.append(essay.title)
+    try:
+        # 整批在一个事务内写入
+        results = await async_db.add_essays_bulk(rows)
+    except Exception:
+        # 批量写入失败时逐条重试，保证单篇出错不影响其他文章
+        logger.exception("批量添加文章时出错，改为逐条添加")
+        results = []
+        for row in rows:
+            try:
+                results.append(await async_db.add_essay(**row))
+            except Exception:
+                logger.exception("添加文章 '%s' 时出错", row["title"])
+                # None 表示出错，与URL重复一样计入跳过
+                results.append(None)
 
-        except Exception as e:
-            print(f"添加文章 '{essay.title}' 时出错: {str(e)}")
+    for essay, success in zip(request.essays, results):
+        if success:
+            successful_titles.append(essay.title)
+            INGEST_ESSAYS.inc(result="inserted")
+        else:
             skipped_titles.append(essay.title)
+            INGEST_ESSAYS.inc(result="duplicate" if success is False else "failed")
 
     return EssayResponse(
         success_count=len(successful_titles),
@@ -87,31 +167,133 @@ async def add_essays(request: EssayRequest):
         message=f"成功添加 {len(successful_titles)} 篇文章，跳过 {len(skipped_titles)} 篇重复URL的文章"
     )
 
+def parse_fields(fields: Optional[str], required: str) -> List[str]:
+    """解析逗号分隔的字段列表，未传时返回全部字段；required 字段始终返回"""
+    if not fields:
+        return list(ESSAY_LIST_FIELDS)
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in ESSAY_LIST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"未知字段: {', '.join(unknown)}")
+    if required not in selected:
+        selected.insert(0, required)
+    return selected
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """请求的 If-None-Match 是否包含当前 ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
 @app.get("/api/essays")
-async def get_all_essays():
-    """获取所有文章列表"""
-    session = db_manager.get_session()
-    try:
-        from database import Essay
-        essays = session.query(Essay).all()
-        return {
-            "count": len(essays),
-            "essays": [
-                {
-                    "id": essay.id,
-                    "title": essay.title,
-                    "subtitle": essay.subtitle,
-                    "author": essay.author,
-                    "url": essay.url,
-                    "content": essay.content,
-                    "entry_time": essay.entry_time.isoformat() if essay.entry_time else None,
-                    "created_at": essay.created_at.isoformat()
-                }
-                for essay in essays
-            ]
-        }
-    finally:
-        session.close()
+async def get_all_essays(
+    request: Request,
+    after_id: Optional[int] = Query(None, description="游标，只返回 id 大于该值的文章"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="单页文章数，不传则返回全部"),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，例如 id,title,url"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json 或 ndjson 流式输出"),
+):
+    """
+    获取文章列表
+
+    - **after_id**: 按 id 翻页的游标，取上一页返回的 next_cursor
+    - **limit**: 单页文章数
+    - **fields**: 只返回指定字段，列表页可省略 content
+    - **format**: ndjson 时逐行流式输出，内存占用与表大小无关
+
+    响应带 ETag，数据没有变化时带 If-None-Match 的请求返回 304。
+    """
+    # 游标依赖 id，始终返回
+    selected = parse_fields(fields, required="id")
+
+    # 任何写入都会增加修订号，最大修订号不变即列表不变；不同查询参数是不同的表示，ETag 也不同
+    representation = hashlib.sha256(
+        json.dumps([after_id, limit, selected, format]).encode("utf-8")
+    ).hexdigest()[:16]
+    etag = f'"essays-{await async_db.latest_revision()}-{representation}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if format == "ndjson":
+        if not stream_slots.acquire(blocking=False):
+            raise HTTPException(status_code=503, detail="流式导出的并发数已达上限，请稍后重试",
+                                headers={"Retry-After": "1"})
+        # 同步生成器由 StreamingResponse 在线程池中迭代
+        essays = db_manager.iter_essays(fields=selected, after_id=after_id, limit=limit)
+        lines = (json.dumps(essay, ensure_ascii=False) + "\n" for essay in essays)
+        return StreamingResponse(LimitedStream(lines, stream_slots), media_type="application/x-ndjson",
+                                 headers={"ETag": etag})
+
+    essays = await async_db.list_essays(fields=selected, after_id=after_id, limit=limit)
+    next_cursor = None
+    if limit is not None and len(essays) == limit:
+        next_cursor = essays[-1]["id"]
+    return JSONResponse({
+        "count": len(essays),
+        "next_cursor": next_cursor,
+        "essays": essays
+    }, headers={"ETag": etag})
+
+@app.get("/api/essays/changes")
+async def get_essay_changes(
+    since: int = Query(0, ge=0, description="上次同步到的修订号，只返回之后新增或修改的文章"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="单页文章数"),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，例如 id,url,revision"),
+):
+    """
+    获取增量变更
+
+    - **since**: 上次同步到的修订号，首次同步传 0
+    - **limit**: 单页文章数，返回数等于 limit 时用 next_since 继续获取
+    - **fields**: 只返回指定字段
+    """
+    selected = parse_fields(fields, required="revision")
+    essays = await async_db.list_essays(fields=selected, since_revision=since, limit=limit)
+    return {
+        "count": len(essays),
+        "next_since": essays[-1]["revision"] if essays else since,
+        "latest_revision": await async_db.latest_revision(),
+        "essays": essays
+    }
+
+@app.get("/api/essays/by-url")
+async def get_essay_by_url(request: Request, url: str = Query(..., description="文章URL")):
+    """
+    根据URL获取文章
+
+    响应带 ETag，文章没有变化时带 If-None-Match 的请求返回 304，不读取正文。
+    """
+    essay = await async_db.get_essay_by_url(url, with_content=False)
+    if essay is None:
+        raise HTTPException(status_code=404, detail="未找到对应URL的文章")
+    etag = f'"essay-{essay.id}-{essay.revision}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    essay = await async_db.get_essay_by_url(url)
+    return JSONResponse({
+        field: value.isoformat() if isinstance(value, datetime) else value
+        for field, value in ((field, getattr(essay, field)) for field in ESSAY_LIST_FIELDS)
+    }, headers={"ETag": etag})
+
+@app.get("/api/essays/search")
+async def search_essays(
+    q: str = Query(..., min_length=1, description="搜索词，多个词用空格分隔"),
+    limit: int = Query(20, ge=1, le=100, description="返回结果数"),
+):
+    """
+    全文搜索文章
+
+    - **q**: 在标题、副标题、作者、内容中搜索，结果按相关度排序并附带命中片段
+    - **limit**: 返回结果数
+    """
+    results = await async_db.search_essays(q, limit=limit)
+    return {
+        "count": len(results),
+        "results": results
+    }
 
 @app.put("/api/essays/content", response_model=UpdateResponse)
 async def update_essay_content(update: EssayUpdate):
@@ -122,23 +304,39 @@ async def update_essay_content(update: EssayUpdate):
     - **content**: 文章内容
     """
     try:
-        success = db_manager.update_essay_content(update.url, update.content)
+        success = await async_db.update_essay_content(update.url, update.content)
         if success:
+            CONTENT_UPDATES.inc(result="updated")
             return UpdateResponse(
                 success=True,
                 message="文章内容更新成功"
             )
         else:
+            CONTENT_UPDATES.inc(result="not_found")
             return UpdateResponse(
                 success=False,
                 message="未找到对应URL的文章"
             )
     except Exception as e:
+        logger.exception("更新文章 '%s' 的内容时出错", update.url)
+        CONTENT_UPDATES.inc(result="failed")
         return UpdateResponse(
             success=False,
             message=f"更新失败: {str(e)}"
         )
 
+@app.get("/api/url-index/stats")
+async def url_index_stats():
+    """URL去重索引的大小、内存占用和命中率"""
+    if db_manager.url_index is None:
+        raise HTTPException(status_code=404, detail="URL索引未启用")
+    return db_manager.url_index.stats()
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 文本格式的运行指标"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/api/health")
 async def health_check():
     """健康检查接口"""
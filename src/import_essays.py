@@ -0,0 +1,268 @@
+"""离线批量导入文章
+
+直接通过 DatabaseManager 写入数据库，不经过 HTTP 接口。输入按流处理，内存占用只与分块大小有关：
+
+- NDJSON（.ndjson / .jsonl）：每行一个 JSON 对象
+- CSV（.csv）：首行为表头，列名与接口字段一致
+- 文本目录：目录下每个 .txt / .md 文件是一篇文章，可带 YAML 风格的 front matter
+
+字段为 title、url、subtitle、author、content、entry_time，entry_time 的解析规则与 POST /api/essays 相同。
+解析在进程池中进行，每块文章在一个事务内写入，写入后记录进度，中断后重新运行同一命令会从断点继续。
+
+用法:
+    python src/import_essays.py essays.ndjson
+    python src/import_essays.py essays.csv --chunk-size 5000 --workers 4
+    python src/import_essays.py input/ --database-url sqlite:///path/to/essays.db
+"""
+import argparse
+import csv
+import functools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from database import DatabaseManager, normalize_url, parse_entry_time
+
+DEFAULT_CHUNK_SIZE = 1000
+TEXT_SUFFIXES = (".txt", ".md")
+FORMATS = ("ndjson", "csv", "text")
+FIELDS = ("title", "url", "subtitle", "author", "content", "entry_time")
+
+
+def detect_format(path: str) -> str:
+    if os.path.isdir(path):
+        return "text"
+    suffix = Path(path).suffix.lower()
+    if suffix in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if suffix == ".csv":
+        return "csv"
+    raise ValueError(f"无法识别输入格式: {path}，请用 --format 指定")
+
+
+def read_records(path: str, input_format: str) -> Iterator[Tuple[str, object]]:
+    """逐条读出原始记录 (格式, 数据)，解析留给 parse_record 在进程池中完成"""
+    if input_format == "ndjson":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield "ndjson", line
+    elif input_format == "csv":
+        # 正文可能很长，放宽单个字段的长度限制
+        csv.field_size_limit(2 ** 31 - 1)
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                yield "csv", row
+    else:
+        for name in sorted(os.listdir(path)):
+            file_path = os.path.join(path, name)
+            if name.lower().endswith(TEXT_SUFFIXES) and os.path.isfile(file_path):
+                yield "text", file_path
+
+
+def parse_text_file(file_path: str) -> dict:
+    """读取文本文件：front matter 中的字段优先，标题依次取 title/name、第一个标题行、文件名"""
+    with open(file_path, encoding="utf-8") as f:
+        text = f.read()
+
+    meta = {}
+    lines = text.splitlines()
+    if lines and lines[0].strip() == "---":
+        for i, line in enumerate(lines[1:], start=1):
+            if line.strip() == "---":
+                text = "\n".join(lines[i + 1:])
+                break
+            key, sep, value = line.partition(":")
+            if sep:
+                meta[key.strip().lower()] = value.strip().strip('"\'')
+        else:
+            meta = {}
+
+    title = meta.get("title") or meta.get("name")
+    if not title:
+        heading = next((line for line in text.splitlines() if line.strip()), "")
+        title = heading.lstrip("#").strip() if heading.startswith("#") else Path(file_path).stem
+
+    return {
+        "title": title,
+        "url": meta.get("url") or Path(file_path).resolve().as_uri(),
+        "subtitle": meta.get("subtitle") or meta.get("description"),
+        "author": meta.get("author"),
+        "content": text.strip(),
+        "entry_time": meta.get("entry_time"),
+    }
+
+
+def parse_record(record: Tuple[str, object], normalize_urls: bool = False) -> Tuple[Optional[dict], Optional[str]]:
+    """把原始记录转换为 add_essays_bulk 的行，返回 (行, 错误信息)
+
+    normalize_urls 为 True 时在解析进程中规范化URL，写入 normalized_url，url 保留原文用于查找旧数据。
+    """
+    kind, data = record
+    try:
+        if kind == "ndjson":
+            data = json.loads(data)
+            if not isinstance(data, dict):
+                return None, "不是 JSON 对象"
+        elif kind == "text":
+            data = parse_text_file(data)
+    except (ValueError, OSError) as e:
+        return None, str(e)
+
+    row = {field: data.get(field) or None for field in FIELDS}
+    for field in FIELDS:
+        if field != "entry_time" and row[field] is not None and not isinstance(row[field], str):
+            row[field] = str(row[field])
+    if not row["title"] or not row["url"]:
+        return None, "缺少 title 或 url"
+    row["entry_time"] = parse_entry_time(row["entry_time"] if isinstance(row["entry_time"], str) else None)
+    if normalize_urls:
+        row["normalized_url"] = normalize_url(row["url"])
+    return row, None
+
+
+def parsed_chunks(records: Iterator, chunk_size: int, executor: Optional[ProcessPoolExecutor],
+                  workers: int = 1, normalize_urls: bool = False) -> Iterator[list]:
+    """按块解析记录；使用进程池时写入当前块的同时解析下一块，最多两块在内存中"""
+    chunks = iter(lambda: list(islice(records, chunk_size)), [])
+    parse = functools.partial(parse_record, normalize_urls=normalize_urls)
+    if executor is None:
+        for chunk in chunks:
+            yield [parse(record) for record in chunk]
+        return
+
+    pending = None
+    for chunk in chunks:
+        submitted = executor.map(parse, chunk, chunksize=max(1, len(chunk) // (workers * 4)))
+        if pending is not None:
+            yield list(pending)
+        pending = submitted
+    if pending is not None:
+        yield list(pending)
+
+
+class Checkpoint:
+    """导入进度文件，记录已写入的记录数，写入时先写临时文件再替换
+
+    进度只对同一输入、同一目标数据库有效，换了数据库时拒绝继续。
+    """
+
+    def __init__(self, path: str, source: str, input_format: str, database_url: str):
+        self.path = path
+        self.source = source
+        self.input_format = input_format
+        self.database_url = database_url
+        self.done = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("source") != self.source or state.get("format") != self.input_format:
+            raise ValueError(f"进度文件 {self.path} 属于其他输入，请删除或使用 --restart")
+        if state.get("database_url") != self.database_url:
+            raise ValueError(f"进度文件 {self.path} 属于其他数据库 {state.get('database_url')}，请删除或使用 --restart")
+        self.done = state["done"]
+        self.inserted = state["inserted"]
+        self.skipped = state["skipped"]
+        self.failed = state["failed"]
+
+    def save(self):
+        state = {
+            "source": self.source,
+            "format": self.input_format,
+            "database_url": self.database_url,
+            "done": self.done,
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def import_essays(db_manager: DatabaseManager, source: str, input_format: str, checkpoint: Checkpoint,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 0):
+    """导入文章，每块提交后保存进度"""
+    records = read_records(source, input_format)
+    if checkpoint.done:
+        print(f"从第 {checkpoint.done + 1} 条记录继续导入")
+        records = islice(records, checkpoint.done, None)
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    start = time.perf_counter()
+    processed = 0
+    try:
+        # URL规范化随解析一起在进程池中完成，写入进程只做去重和写入
+        for chunk in parsed_chunks(records, chunk_size, executor, workers, db_manager.normalize_urls):
+            rows = []
+            for i, (row, error) in enumerate(chunk):
+                if error is not None:
+                    print(f"第 {checkpoint.done + i + 1} 条记录无效: {error}", file=sys.stderr)
+                    checkpoint.failed += 1
+                else:
+                    rows.append(row)
+
+            # 块内写入在一个事务中完成；提交后、保存进度前中断时，重新导入的文章会因URL重复被跳过
+            results = db_manager.add_essays_bulk(rows) if rows else []
+            inserted = sum(results)
+            checkpoint.inserted += inserted
+            checkpoint.skipped += len(results) - inserted
+            checkpoint.done += len(chunk)
+            checkpoint.save()
+
+            processed += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"已处理 {checkpoint.done} 条：新增 {checkpoint.inserted}，跳过 {checkpoint.skipped}，"
+                  f"无效 {checkpoint.failed}，{processed / elapsed:.0f} 条/秒")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="从 NDJSON、CSV 或文本目录批量导入文章")
+    parser.add_argument("source", help="输入文件或文本文件目录")
+    parser.add_argument("--format", choices=FORMATS, help="输入格式，默认按扩展名判断")
+    parser.add_argument("--database-url", default=None, help="数据库地址，默认使用 local_db/essays.db")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="每个事务写入的记录数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="解析进程数，1 表示不使用进程池")
+    parser.add_argument("--checkpoint", help="进度文件路径，默认在输入旁边生成 .import-checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="忽略已有进度，从头导入")
+    parser.add_argument("--normalize-urls", action="store_true", help="按规范化后的URL去重")
+    parser.add_argument("--compress-content", action="store_true", help="正文压缩后按内容哈希去重存储")
+    args = parser.parse_args()
+
+    source = os.path.abspath(args.source)
+    input_format = args.format or detect_format(source)
+    checkpoint_path = args.checkpoint or source.rstrip(os.sep) + ".import-checkpoint.json"
+    # 每块写入前已用一次 IN 查询去重，不需要随导入量增长的URL索引
+    db_manager = DatabaseManager(
+        args.database_url,
+        url_index=False,
+        normalize_urls=args.normalize_urls,
+        compress_content=args.compress_content
+    )
+    database_url = db_manager.engine.url.render_as_string(hide_password=True)
+    checkpoint = Checkpoint(checkpoint_path, source, input_format, database_url)
+    if not args.restart:
+        checkpoint.load()
+
+    import_essays(db_manager, source, input_format, checkpoint, chunk_size=args.chunk_size, workers=args.workers)
+    print(f"导入完成，进度文件: {checkpoint_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""数据库维护命令
+
+用法:
+    python src/manage_db.py rebuild-fts [--database-url sqlite:///path/to/essays.db]
+    python src/manage_db.py compress-content [--database-url sqlite:///path/to/essays.db]
+"""
+import argparse
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from database import DatabaseManager
+
+
+def rebuild_fts(db_manager: DatabaseManager):
+    """重建全文索引，用于回填旧数据库或修复索引"""
+    db_manager.rebuild_search_index()
+    print("全文索引重建完成")
+
+
+def database_size(db_manager: DatabaseManager) -> int:
+    """数据库文件及 WAL 文件的总字节数"""
+    path = db_manager.engine.url.database
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+
+
+def compress_content(db_manager: DatabaseManager):
+    """把已有文章的正文迁移为压缩存储并回收空间"""
+    db_manager.vacuum()
+    size_before = database_size(db_manager)
+    migrated = db_manager.compress_existing_content()
+    db_manager.vacuum()
+    size_after = database_size(db_manager)
+    print(f"迁移 {migrated} 篇文章的正文，数据库大小 {size_before / 1024 / 1024:.1f} MB -> {size_after / 1024 / 1024:.1f} MB")
+
+
+COMMANDS = {
+    "rebuild-fts": rebuild_fts,
+    "compress-content": compress_content,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章数据库维护命令")
+    parser.add_argument("command", choices=sorted(COMMANDS), help="要执行的命令")
+    parser.add_argument("--database-url", default=None, help="数据库地址，默认使用 local_db/essays.db")
+    args = parser.parse_args()
+
+    db_manager = DatabaseManager(args.database_url)
+    COMMANDS[args.command](db_manager)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""进程内指标收集，以 Prometheus 文本格式输出
+
+只实现本项目用到的计数器、直方图和回调指标，不依赖 prometheus_client。
+"""
+import threading
+import time
+from typing import Callable, Dict, Iterator, Sequence, Tuple
+
+from sqlalchemy import event
+
+# 延迟直方图的桶上界（秒）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """只增不减的计数器"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name + "_total", dict(zip(self.labelnames, key)), value
+
+
+class Histogram:
+    """按桶累计的直方图"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield self.name + "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield self.name + "_sum", labels, total
+            yield self.name + "_count", labels, cumulative
+
+
+class CallbackMetric:
+    """输出时调用回调取值的指标，回调返回 {标签元组: 值}"""
+
+    def __init__(self, name: str, documentation: str, metric_type: str,
+                 callback: Callable[[], Dict[tuple, float]], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.type = metric_type
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterator[Sample]:
+        suffix = "_total" if self.type == "counter" else ""
+        for key, value in sorted(self.callback().items()):
+            yield self.name + suffix, dict(zip(self.labelnames, key)), value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            # 文本格式 0.0.4 中 TYPE 的名称须与样本名一致，计数器样本带 _total 后缀
+            name = metric.name + "_total" if metric.type == "counter" else metric.name
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "essay_http_request_duration_seconds", "HTTP 请求处理耗时（流式响应只计到响应头发出）",
+    ("method", "path", "status")
+))
+SQL_STATEMENT_DURATION = REGISTRY.register(Histogram(
+    "essay_sql_statement_duration_seconds", "SQL 语句执行耗时，按语句类型区分", ("statement",)
+))
+SQL_STATEMENT_ERRORS = REGISTRY.register(Counter(
+    "essay_sql_statement_errors", "执行出错的 SQL 语句数", ("statement",)
+))
+INGEST_ESSAYS = REGISTRY.register(Counter(
+    "essay_ingest_essays", "添加文章的结果：inserted 成功，duplicate URL重复跳过，failed 出错", ("result",)
+))
+CONTENT_UPDATES = REGISTRY.register(Counter(
+    "essay_content_updates", "更新文章内容的结果：updated 成功，not_found 未找到文章，failed 出错", ("result",)
+))
+
+
+def _statement_type(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+def instrument_database(db_manager):
+    """为 DatabaseManager 注册 SQL 计时事件和会话、连接池、URL索引指标"""
+    engine = db_manager.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        SQL_STATEMENT_DURATION.observe(time.perf_counter() - start, statement=_statement_type(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+        SQL_STATEMENT_ERRORS.inc(statement=_statement_type(exception_context.statement or ""))
+
+    REGISTRY.register(CallbackMetric(
+        "essay_db_sessions_opened", "打开的数据库会话数", "counter",
+        lambda: {(): db_manager.sessions_opened}
+    ))
+    REGISTRY.register(CallbackMetric(
+        "essay_db_pool_checked_out", "当前借出的数据库连接数", "gauge",
+        lambda: {(): engine.pool.checkedout()} if hasattr(engine.pool, "checkedout") else {}
+    ))
+    def url_index_lookups():
+        stats = db_manager.url_index.stats()
+        return {
+            ("definitely_new",): stats["definitely_new"],
+            ("confirmed_hit",): stats["confirmed_hits"],
+            ("false_positive",): stats["false_positives"],
+        }
+
+    if db_manager.url_index is not None:
+        REGISTRY.register(CallbackMetric(
+            "essay_url_index_lookups", "URL索引查询次数，按结果区分", "counter",
+            url_index_lookups,
+            ("result",)
+        ))
+        REGISTRY.register(CallbackMetric(
+            "essay_url_index_memory_bytes", "URL索引占用的内存", "gauge",
+            lambda: {(): db_manager.url_index.stats()["memory_bytes"]}
+        ))
@@ -0,0 +1,46 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from database import AsyncDatabaseManager, DatabaseManager
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'essays.db'}"
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "compressed"])
+def db(request, database_url):
+    """分别以明文和压缩两种存储方式创建的临时数据库"""
+    manager = DatabaseManager(database_url, compress_content=request.param)
+    yield manager
+    manager.engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def essay_manager(tmp_path_factory):
+    pytest.importorskip("httpx")
+    # essay_manager 在导入时按环境变量创建数据库
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path_factory.mktemp('api') / 'essays.db'}"
+    try:
+        return importlib.import_module("essay_manager")
+    finally:
+        del os.environ["DATABASE_URL"]
+
+
+@pytest.fixture
+def client(essay_manager, database_url, monkeypatch):
+    """每个测试使用独立临时数据库的接口客户端"""
+    from fastapi.testclient import TestClient
+
+    async_db = AsyncDatabaseManager(DatabaseManager(database_url))
+    monkeypatch.setattr(essay_manager, "db_manager", async_db.db)
+    monkeypatch.setattr(essay_manager, "async_db", async_db)
+    with TestClient(essay_manager.app) as client:
+        yield client
+    async_db.shutdown()
@@ -0,0 +1,45 @@
+from database import DatabaseManager
+
+
+def essay(title, url, **fields):
+    return {"title": title, "url": url, **fields}
+
+
+def test_add_essays_counts_duplicates(client):
+    response = client.post("/api/essays", json={"essays": [
+        essay("第一篇", "https://example.com/1", content="正文"),
+        essay("第二篇", "https://example.com/2", entry_time="2024-01-15T10:30:00"),
+        # 同一批中的重复URL
+        essay("第一篇转载", "https://example.com/1"),
+    ]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success_count"] == 2
+    assert body["skipped_count"] == 1
+    assert body["successful_titles"] == ["第一篇", "第二篇"]
+
+    # 与数据库中已有文章重复
+    body = client.post("/api/essays", json={"essays": [
+        essay("第一篇", "https://example.com/1"),
+        essay("第三篇", "https://example.com/3"),
+    ]}).json()
+    assert body["success_count"] == 1
+    assert body["skipped_count"] == 1
+    assert body["successful_titles"] == ["第三篇"]
+
+
+def test_add_essays_bulk_results_follow_input_order(database_url):
+    db = DatabaseManager(database_url)
+    db.add_essay(title="已有", url="https://example.com/0")
+
+    results = db.add_essays_bulk([
+        essay("一", "https://example.com/1"),
+        essay("已有", "https://example.com/0"),
+        essay("二", "https://example.com/2"),
+        # 跨块的重复URL
+        essay("一", "https://example.com/1"),
+        essay("三", "https://example.com/3"),
+    ], chunk_size=2)
+    assert results == [True, False, True, False, True]
+    assert db.get_essay_by_url("https://example.com/1").title == "一"
+    assert db.get_essay_by_url("https://example.com/3").title == "三"
@@ -0,0 +1,129 @@
+import sqlite3
+
+from sqlalchemy import text
+
+from database import DatabaseManager
+
+
+def seed(client):
+    client.post("/api/essays", json={"essays": [
+        {"title": "第一篇", "url": "https://example.com/1", "content": "第一篇的正文"},
+        {"title": "第二篇", "url": "https://example.com/2", "content": "第二篇的正文"},
+    ]})
+
+
+def test_noop_update_keeps_revision(db):
+    db.add_essay(title="标题", url="https://example.com/1", content="正文")
+    revision = db.get_essay_by_url("https://example.com/1").revision
+
+    assert db.update_essay_content("https://example.com/1", "正文")
+    assert db.get_essay_by_url("https://example.com/1").revision == revision
+    assert db.latest_revision() == revision
+
+    assert db.update_essay_content("https://example.com/1", "新正文")
+    essay = db.get_essay_by_url("https://example.com/1")
+    assert essay.revision > revision
+    assert essay.content == "新正文"
+
+
+def test_changes_feed(client):
+    seed(client)
+    body = client.get("/api/essays/changes?since=0&fields=url").json()
+    assert [essay["url"] for essay in body["essays"]] == ["https://example.com/1", "https://example.com/2"]
+    assert body["next_since"] == body["latest_revision"] == 2
+
+    client.put("/api/essays/content", json={"url": "https://example.com/1", "content": "修改后的正文"})
+    body = client.get(f"/api/essays/changes?since={body['next_since']}").json()
+    assert [essay["url"] for essay in body["essays"]] == ["https://example.com/1"]
+    assert body["essays"][0]["revision"] == 3
+    assert body["essays"][0]["updated_at"] is not None
+
+    body = client.get("/api/essays/changes?since=0&limit=1").json()
+    assert body["count"] == 1
+    assert body["next_since"] == 2
+
+
+def test_list_304_only_for_same_representation(client):
+    seed(client)
+    etag = client.get("/api/essays").headers["etag"]
+    assert client.get("/api/essays", headers={"If-None-Match": etag}).status_code == 304
+
+    for query in ("limit=1", "after_id=1", "fields=id,title", "format=ndjson"):
+        response = client.get(f"/api/essays?{query}", headers={"If-None-Match": etag})
+        assert response.status_code == 200, query
+        assert response.headers["etag"] != etag
+
+    page_etag = client.get("/api/essays?limit=1").headers["etag"]
+    assert client.get("/api/essays?limit=1", headers={"If-None-Match": page_etag}).status_code == 304
+
+
+def test_list_etag_changes_after_write(client):
+    seed(client)
+    etag = client.get("/api/essays").headers["etag"]
+    client.put("/api/essays/content", json={"url": "https://example.com/2", "content": "修改后的正文"})
+    response = client.get("/api/essays", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_by_url_304(client):
+    seed(client)
+    params = {"url": "https://example.com/1"}
+    etag = client.get("/api/essays/by-url", params=params).headers["etag"]
+    assert client.get("/api/essays/by-url", params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    # 内容相同的更新不改变修订号，ETag 仍然有效
+    client.put("/api/essays/content", json={"url": "https://example.com/1", "content": "第一篇的正文"})
+    assert client.get("/api/essays/by-url", params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    client.put("/api/essays/content", json={"url": "https://example.com/1", "content": "新的正文"})
+    assert client.get("/api/essays/by-url", params=params, headers={"If-None-Match": etag}).status_code == 200
+
+
+def delete_essay(database_url, url):
+    """模拟其他客户端直接删除文章"""
+    conn = sqlite3.connect(database_url[len("sqlite:///"):])
+    try:
+        conn.execute("DELETE FROM essays WHERE url = ?", (url,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_revision_not_reused_after_deleting_latest(db, database_url):
+    db.add_essay(title="一", url="https://example.com/1")
+    db.add_essay(title="二", url="https://example.com/2")
+    delete_essay(database_url, "https://example.com/2")
+    db.add_essay(title="三", url="https://example.com/3")
+
+    essay = db.get_essay_by_url("https://example.com/3")
+    assert essay.revision == 4
+    assert [row["url"] for row in db.iter_essays(fields=("id", "url"), since_revision=2)] == ["https://example.com/3"]
+    assert db.latest_revision() == 4
+
+
+def test_list_etag_changes_after_delete(client, database_url):
+    seed(client)
+    client.post("/api/essays", json={"essays": [{"title": "第三篇", "url": "https://example.com/3"}]})
+    etag = client.get("/api/essays").headers["etag"]
+
+    # 删除的不是修订号最大的文章
+    delete_essay(database_url, "https://example.com/2")
+    response = client.get("/api/essays", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+
+
+def test_revision_counter_migrated_from_max_triggers(database_url):
+    db = DatabaseManager(database_url)
+    db.add_essay(title="一", url="https://example.com/1")
+    db.add_essay(title="二", url="https://example.com/2")
+    # 旧版数据库：没有计数表
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP TABLE essay_revision"))
+    db.engine.dispose()
+
+    db = DatabaseManager(database_url)
+    assert db.latest_revision() == 2
+    db.add_essay(title="三", url="https://example.com/3")
+    assert db.get_essay_by_url("https://example.com/3").revision == 3
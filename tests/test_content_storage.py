@@ -0,0 +1,101 @@
+import sqlite3
+
+from sqlalchemy import text
+
+from database import DatabaseManager
+
+
+def urls(results):
+    return [result["url"] for result in results]
+
+
+def count(db, table):
+    with db.engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+def test_identical_bodies_stored_once(database_url):
+    db = DatabaseManager(database_url, compress_content=True)
+    db.add_essays_bulk([
+        {"title": "原文", "url": "https://example.com/1", "content": "同一篇正文" * 100},
+        {"title": "镜像", "url": "https://mirror.example.com/1", "content": "同一篇正文" * 100},
+    ])
+    db.add_essay(title="再次转载", url="https://mirror2.example.com/1", content="同一篇正文" * 100)
+    assert count(db, "essay_contents") == 1
+    essay = db.get_essay_by_url("https://mirror2.example.com/1")
+    assert essay.content_hash is not None
+    assert essay.content == "同一篇正文" * 100
+
+
+def test_metadata_lookup_does_not_load_content(db):
+    db.add_essay(title="标题", url="https://example.com/1", content="正文")
+    essay = db.get_essay_by_url("https://example.com/1", with_content=False)
+    assert "content" not in essay.__dict__
+    assert db.get_essay_by_url("https://example.com/1").content == "正文"
+
+
+def test_unused_content_deleted_after_update(database_url):
+    db = DatabaseManager(database_url, compress_content=True)
+    db.add_essay(title="标题", url="https://example.com/1", content="旧正文")
+    db.add_essay(title="镜像", url="https://example.com/2", content="共享正文")
+    db.add_essay(title="标题", url="https://example.com/3", content="共享正文")
+
+    db.update_essay_content("https://example.com/1", "新正文")
+    db.update_essay_content("https://example.com/2", "另一篇正文")
+    # 旧正文不再被引用被删除，共享正文仍被第三篇引用
+    assert count(db, "essay_contents") == 3
+    assert db.get_essay_by_url("https://example.com/3").content == "共享正文"
+
+
+def test_other_clients_can_write_without_udf(db, database_url):
+    db.add_essay(title="标题", url="https://example.com/1", content="压缩或明文正文")
+    conn = sqlite3.connect(database_url[len("sqlite:///"):])
+    try:
+        conn.execute("INSERT INTO essays(title, url, content) VALUES ('外部', 'https://example.com/2', '外部正文')")
+        conn.execute("UPDATE essays SET title = '改名' WHERE url = 'https://example.com/1'")
+        conn.execute("DELETE FROM essays WHERE url = 'https://example.com/2'")
+        conn.commit()
+    finally:
+        conn.close()
+    assert db.get_essay_by_url("https://example.com/1").title == "改名"
+
+
+def test_compress_existing_content_keeps_revision(database_url):
+    db = DatabaseManager(database_url)
+    db.add_essay(title="标题", url="https://example.com/1", content="明文正文")
+    revision = db.latest_revision()
+
+    assert db.compress_existing_content() == 1
+    essay = db.get_essay_by_url("https://example.com/1")
+    assert essay.content_hash is not None
+    assert essay.content == "明文正文"
+    assert essay.revision == revision
+    assert db.latest_revision() == revision
+    assert urls(db.search_essays("明文正文")) == ["https://example.com/1"]
+
+
+def test_search_index_stores_no_body_copy(database_url):
+    db = DatabaseManager(database_url, compress_content=True)
+    db.add_essay(title="标题", url="https://example.com/1", content="只压缩保存一份的正文")
+    with db.engine.connect() as conn:
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+    assert "essays_fts_content" not in tables
+    results = db.search_essays("保存一份")
+    assert urls(results) == ["https://example.com/1"]
+    assert results[0]["snippet"] == "只压缩[保存一份]的正文"
+
+
+def test_legacy_search_index_rebuilt_as_contentless(database_url):
+    db = DatabaseManager(database_url, compress_content=True)
+    db.add_essay(title="标题", url="https://example.com/1", content="旧版索引里的正文")
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP TABLE essays_fts"))
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE essays_fts USING fts5(title, subtitle, author, content, tokenize='trigram')"
+        ))
+
+    db = DatabaseManager(database_url, compress_content=True)
+    with db.engine.connect() as conn:
+        sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'essays_fts'")).scalar()
+    assert "content=''" in sql
+    assert urls(db.search_essays("旧版索引")) == ["https://example.com/1"]
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+import pytest
+
+from database import AsyncDatabaseManager, GroupCommitWriter
+
+
+@pytest.fixture
+def writer(db):
+    writer = GroupCommitWriter(db)
+    yield writer
+    writer.close()
+
+
+def hold_writer(writer):
+    """提交一个阻塞写线程的请求，之后提交的请求会进入同一批"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def wait(session):
+        started.set()
+        release.wait(timeout=5)
+
+    writer.submit(wait)
+    started.wait(timeout=5)
+    return release
+
+
+def test_failing_op_does_not_affect_batch(db, writer):
+    def fail(session):
+        raise ValueError("写入失败")
+
+    release = hold_writer(writer)
+    first = writer.submit(db._add_essay, title="一", url="https://example.com/1", content="正文一")
+    failing = writer.submit(fail)
+    second = writer.submit(db._add_essay, title="二", url="https://example.com/2", content="正文二")
+    release.set()
+
+    assert first.result(timeout=5) is True
+    assert second.result(timeout=5) is True
+    with pytest.raises(ValueError):
+        failing.result(timeout=5)
+    assert db.essay_exists("https://example.com/1")
+    assert db.essay_exists("https://example.com/2")
+
+
+def test_cancelled_op_is_skipped(db, writer):
+    release = hold_writer(writer)
+    first = writer.submit(db._add_essay, title="一", url="https://example.com/1")
+    cancelled = writer.submit(db._add_essay, title="二", url="https://example.com/2")
+    assert cancelled.cancel()
+    release.set()
+
+    assert first.result(timeout=5) is True
+    assert not db.essay_exists("https://example.com/2")
+    assert writer.thread.is_alive()
+
+
+def test_writer_survives_unexpected_errors(db, writer, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("连接失败")
+
+    monkeypatch.setattr(writer, "_commit_batch", broken)
+    with pytest.raises(RuntimeError):
+        writer.submit(db._add_essay, title="一", url="https://example.com/1").result(timeout=5)
+
+    monkeypatch.undo()
+    assert writer.submit(db._add_essay, title="二", url="https://example.com/2").result(timeout=5) is True
+
+
+def test_async_writes_return_own_results(db):
+    async_db = AsyncDatabaseManager(db)
+
+    async def write():
+        return await asyncio.gather(*(
+            async_db.add_essay(title=f"第{i}篇", url=f"https://example.com/{i % 5}") for i in range(10)
+        ))
+
+    try:
+        results = asyncio.run(write())
+    finally:
+        async_db.shutdown()
+    assert sum(results) == 5
+    assert all(results[:5])
+
+
+def test_single_write_commits_without_waiting(db):
+    writer = GroupCommitWriter(db, max_delay=5)
+    try:
+        future = writer.submit(db._add_essay, title="一", url="https://example.com/1", content="正文一")
+        # 没有其他请求排队时不等待 max_delay
+        assert future.result(timeout=1) is True
+    finally:
+        writer.close()
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from database import DatabaseManager
+from import_essays import Checkpoint, import_essays, parse_record, parse_text_file
+
+
+@pytest.fixture
+def importer_db(database_url):
+    db = DatabaseManager(database_url, url_index=False)
+    yield db
+    db.engine.dispose()
+
+
+def write_ndjson(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def essay_line(i):
+    return json.dumps({"title": f"第{i}篇", "url": f"https://example.com/{i}", "content": f"正文{i}"})
+
+
+def test_invalid_rows_are_counted(tmp_path, importer_db, database_url):
+    source = write_ndjson(tmp_path / "essays.ndjson", [
+        essay_line(1),
+        "{不是 JSON",
+        json.dumps(["列表"]),
+        json.dumps({"title": "缺少URL"}),
+        essay_line(1),
+        essay_line(2),
+    ])
+    checkpoint = Checkpoint(str(tmp_path / "progress.json"), source, "ndjson", database_url)
+    import_essays(importer_db, source, "ndjson", checkpoint, chunk_size=4)
+
+    assert (checkpoint.done, checkpoint.inserted, checkpoint.skipped, checkpoint.failed) == (6, 2, 1, 3)
+    assert importer_db.get_essay_by_url("https://example.com/2").content == "正文2"
+
+
+def test_resume_from_checkpoint(tmp_path, importer_db, database_url, monkeypatch):
+    source = write_ndjson(tmp_path / "essays.ndjson", [essay_line(i) for i in range(10)])
+    checkpoint_path = str(tmp_path / "progress.json")
+
+    add_essays_bulk = importer_db.add_essays_bulk
+    calls = []
+
+    def interrupted(rows):
+        calls.append(len(rows))
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return add_essays_bulk(rows)
+
+    monkeypatch.setattr(importer_db, "add_essays_bulk", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        import_essays(importer_db, source, "ndjson",
+                      Checkpoint(checkpoint_path, source, "ndjson", database_url), chunk_size=3)
+    monkeypatch.undo()
+
+    checkpoint = Checkpoint(checkpoint_path, source, "ndjson", database_url)
+    checkpoint.load()
+    assert (checkpoint.done, checkpoint.inserted) == (6, 6)
+
+    import_essays(importer_db, source, "ndjson", checkpoint, chunk_size=3)
+    assert (checkpoint.done, checkpoint.inserted, checkpoint.skipped) == (10, 10, 0)
+    assert importer_db.essay_exists("https://example.com/9")
+
+
+def test_checkpoint_rejects_other_database(tmp_path, database_url):
+    path = str(tmp_path / "progress.json")
+    Checkpoint(path, "essays.ndjson", "ndjson", database_url).save()
+    with pytest.raises(ValueError):
+        Checkpoint(path, "essays.ndjson", "ndjson", "sqlite:///other.db").load()
+    with pytest.raises(ValueError):
+        Checkpoint(path, "other.ndjson", "ndjson", database_url).load()
+
+
+def test_csv_and_text_records(tmp_path):
+    row, error = parse_record(("csv", {
+        "title": "标题", "url": "https://example.com/1", "author": "", "entry_time": "2024-01-15 10:30:00"
+    }))
+    assert error is None
+    assert row["author"] is None
+    assert row["entry_time"].year == 2024
+
+    text_file = tmp_path / "post.md"
+    text_file.write_text("---\nauthor: 作者\nurl: https://example.com/2\n---\n# 文章标题\n\n正文段落\n", encoding="utf-8")
+    essay = parse_text_file(str(text_file))
+    assert essay["title"] == "文章标题"
+    assert essay["author"] == "作者"
+    assert essay["url"] == "https://example.com/2"
+    assert essay["content"] == "# 文章标题\n\n正文段落"
+
+
+def test_urls_normalized_in_worker_processes(tmp_path, database_url):
+    row, error = parse_record(("ndjson", json.dumps({"title": "标题", "url": "HTTPS://Example.com/a/?utm_source=x"})),
+                              normalize_urls=True)
+    assert error is None
+    assert row["url"] == "HTTPS://Example.com/a/?utm_source=x"
+    assert row["normalized_url"] == "https://example.com/a"
+
+    source = write_ndjson(tmp_path / "essays.ndjson", [
+        json.dumps({"title": "原文", "url": "https://Example.com/a/?utm_source=feed"}),
+        json.dumps({"title": "转载", "url": "https://example.com/a"}),
+        json.dumps({"title": "其他", "url": "https://example.com/b"}),
+    ])
+    db = DatabaseManager(database_url, url_index=False, normalize_urls=True)
+    checkpoint = Checkpoint(str(tmp_path / "progress.json"), source, "ndjson", database_url)
+    import_essays(db, source, "ndjson", checkpoint, chunk_size=10, workers=2)
+
+    assert (checkpoint.inserted, checkpoint.skipped) == (2, 1)
+    assert db.get_essay_by_url("https://example.com/a").title == "原文"
+    db.engine.dispose()
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def essays(client):
+    client.post("/api/essays", json={"essays": [
+        {"title": f"第{i}篇", "url": f"https://example.com/{i}", "author": "作者", "content": f"正文{i}"}
+        for i in range(1, 6)
+    ]})
+    return client
+
+
+def test_keyset_pagination(essays):
+    first = essays.get("/api/essays?limit=2").json()
+    assert first["count"] == 2
+    assert [essay["id"] for essay in first["essays"]] == [1, 2]
+    assert first["next_cursor"] == 2
+
+    second = essays.get(f"/api/essays?limit=2&after_id={first['next_cursor']}").json()
+    assert [essay["id"] for essay in second["essays"]] == [3, 4]
+
+    last = essays.get(f"/api/essays?limit=2&after_id={second['next_cursor']}").json()
+    assert [essay["id"] for essay in last["essays"]] == [5]
+    assert last["next_cursor"] is None
+
+
+def test_without_limit_returns_everything(essays):
+    body = essays.get("/api/essays").json()
+    assert body["count"] == 5
+    assert body["next_cursor"] is None
+    assert body["essays"][0]["content"] == "正文1"
+
+
+def test_fields_projection(essays):
+    body = essays.get("/api/essays?fields=title,url").json()
+    # 游标依赖 id，始终返回
+    assert body["essays"][0] == {"id": 1, "title": "第1篇", "url": "https://example.com/1"}
+
+    response = essays.get("/api/essays?fields=title,password")
+    assert response.status_code == 400
+
+
+def test_ndjson_stream(essays):
+    response = essays.get("/api/essays?format=ndjson&fields=id,url&after_id=3")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"id": 4, "url": "https://example.com/4"},
+        {"id": 5, "url": "https://example.com/5"},
+    ]
+
+
+def test_ndjson_stream_limit(essays, essay_manager):
+    slots = essay_manager.stream_slots
+    acquired = [slots.acquire(blocking=False) for _ in range(essay_manager.MAX_CONCURRENT_STREAMS)]
+    try:
+        response = essays.get("/api/essays?format=ndjson")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+    finally:
+        for taken in acquired:
+            if taken:
+                slots.release()
+
+    response = essays.get("/api/essays?format=ndjson")
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 5
@@ -0,0 +1,67 @@
+import re
+
+
+def sample(text, name, **labels):
+    """取出指标样本的值，不存在时为 0"""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = re.escape(name + (f"{{{label_text}}}" if labels else "")) + r" (\S+)"
+    match = re.search(pattern, text)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_metrics_endpoint(client):
+    before = client.get("/api/metrics").text
+    client.post("/api/essays", json={"essays": [
+        {"title": "一", "url": "https://example.com/1"},
+        {"title": "一", "url": "https://example.com/1"},
+    ]})
+    client.put("/api/essays/content", json={"url": "https://example.com/404", "content": "正文"})
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = response.text
+
+    def delta(name, **labels):
+        return sample(after, name, **labels) - sample(before, name, **labels)
+
+    assert delta("essay_ingest_essays_total", result="inserted") == 1
+    assert delta("essay_ingest_essays_total", result="duplicate") == 1
+    assert delta("essay_content_updates_total", result="not_found") == 1
+    assert delta("essay_http_request_duration_seconds_count", method="POST", path="/api/essays", status=200) == 1
+    assert "essay_db_pool_checked_out " in after
+    assert "# TYPE essay_http_request_duration_seconds histogram" in after
+    assert "# TYPE essay_ingest_essays_total counter" in after
+
+
+def test_samples_belong_to_declared_families(client):
+    text = client.get("/api/metrics").text
+    families = {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, metric_type = line.split(" ")
+            families[name] = metric_type
+    suffixes = {"histogram": ("_bucket", "_sum", "_count"), "counter": ("",), "gauge": ("",)}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        sample_name = re.match(r"[a-zA-Z_:][a-zA-Z0-9_:]*", line).group(0)
+        assert any(
+            sample_name == family + suffix
+            for family, metric_type in families.items() for suffix in suffixes[metric_type]
+        ), sample_name
+    assert all(family.endswith("_total") for family, metric_type in families.items() if metric_type == "counter")
+
+
+def test_histogram_buckets_are_cumulative(client):
+    client.get("/api/health")
+    text = client.get("/api/metrics").text
+    counts = [
+        float(value) for value in re.findall(
+            r'essay_http_request_duration_seconds_bucket\{method="GET",path="/api/health",status="200",le="[^"]+"\} (\S+)',
+            text
+        )
+    ]
+    assert counts == sorted(counts)
+    assert counts[-1] == sample(text, "essay_http_request_duration_seconds_count",
+                                method="GET", path="/api/health", status=200)
@@ -0,0 +1,65 @@
+def urls(results):
+    return [result["url"] for result in results]
+
+
+def test_search_after_update(db):
+    db.add_essays_bulk([
+        {"title": "火箭", "url": "https://example.com/1", "content": "可回收火箭的发动机"},
+        {"title": "电池", "url": "https://example.com/2", "content": "固态电池的能量密度"},
+    ])
+    assert urls(db.search_essays("发动机")) == ["https://example.com/1"]
+
+    assert db.update_essay_content("https://example.com/1", "星舰的隔热瓦")
+    assert db.search_essays("发动机") == []
+    assert urls(db.search_essays("隔热瓦")) == ["https://example.com/1"]
+    # 短词在长词命中的文章中过滤
+    assert urls(db.search_essays("隔热瓦 星舰")) == ["https://example.com/1"]
+    assert db.search_essays("隔热瓦 电池") == []
+    assert urls(db.search_essays("电池")) == ["https://example.com/2"]
+
+
+def test_search_index_rebuild(db):
+    db.add_essay(title="标题", url="https://example.com/1", content="压缩正文也能被搜索")
+    db.rebuild_search_index()
+    assert urls(db.search_essays("被搜索")) == ["https://example.com/1"]
+
+
+def test_search_ranking_and_snippet(db):
+    db.add_essays_bulk([
+        {"title": "其他", "url": "https://example.com/1", "content": "正文里顺带提到人工智能"},
+        {"title": "人工智能简史", "url": "https://example.com/2", "content": "从图灵开始"},
+    ])
+    results = db.search_essays("人工智能")
+    # 标题命中的权重更高
+    assert urls(results) == ["https://example.com/2", "https://example.com/1"]
+    assert results[0]["score"] is not None
+    assert "[人工智能]" in results[1]["snippet"]
+
+
+def test_short_terms_use_like(db):
+    db.add_essays_bulk([
+        {"title": "标题", "url": "https://example.com/1", "content": "50%_折扣"},
+        {"title": "标题", "url": "https://example.com/2", "content": "五折"},
+    ])
+    results = db.search_essays("%_")
+    assert urls(results) == ["https://example.com/1"]
+    assert results[0]["score"] is None
+    assert results[0]["snippet"] == "50[%_]折扣"
+
+
+def test_search_endpoint(client):
+    client.post("/api/essays", json={"essays": [
+        {"title": "火箭回收", "url": "https://example.com/1", "content": "猎鹰九号"},
+    ]})
+    body = client.get("/api/essays/search", params={"q": "猎鹰九号"}).json()
+    assert body["count"] == 1
+    assert body["results"][0]["url"] == "https://example.com/1"
+
+
+def test_like_snippet_ignores_case(db):
+    db.add_essay(title="标题", url="https://example.com/1", content="Straße und AbC")
+    results = db.search_essays("b")
+    assert urls(results) == ["https://example.com/1"]
+    assert results[0]["snippet"] == "Straße und A[b]C"
+    results = db.search_essays("A")
+    assert results[0]["snippet"] == "Str[a]ße und AbC"
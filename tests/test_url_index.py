@@ -0,0 +1,99 @@
+import threading
+
+import database
+from database import DatabaseManager, UrlIndex, normalize_url
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Example.COM:443/a/b/?utm_source=x&id=3&fbclid=y#top") == "https://example.com/a/b?id=3#top"
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+    # from 常被用作正文参数，不算跟踪参数
+    assert normalize_url("https://example.com/s?from=2024") == "https://example.com/s?from=2024"
+
+
+def test_url_index_membership():
+    index = UrlIndex()
+    index.add("https://example.com/1")
+    assert index.might_contain("https://example.com/1")
+    assert not index.might_contain("https://example.com/2")
+    assert len(index) == 1
+    stats = index.stats()
+    assert stats["lookups"] == 2
+    assert stats["definitely_new"] == 1
+
+
+
+def test_url_index_merges_recent_adds(monkeypatch):
+    monkeypatch.setattr(database, "URL_INDEX_BUFFER_SIZE", 8)
+    index = UrlIndex(UrlIndex.digest(f"https://example.com/{i}") for i in range(100))
+    for i in range(100, 150):
+        index.add(f"https://example.com/{i}")
+    index.add("https://example.com/1")
+    assert len(index) == 150
+    assert all(index.might_contain(f"https://example.com/{i}") for i in range(150))
+    assert not index.might_contain("https://example.com/150")
+    # 归并后每个摘要只占 8 字节
+    assert index.stats()["memory_bytes"] < 150 * 8 + 2048
+
+
+def test_url_index_counters_are_thread_safe():
+    index = UrlIndex()
+
+    def lookup():
+        for i in range(2000):
+            index.might_contain(f"https://example.com/{i}")
+            index.record_hit(False)
+
+    threads = [threading.Thread(target=lookup) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = index.stats()
+    assert stats["lookups"] == stats["definitely_new"] == stats["false_positives"] == 8000
+
+def test_url_index_loaded_from_database(database_url):
+    DatabaseManager(database_url).add_essays_bulk([
+        {"title": "一", "url": "https://example.com/1"},
+        {"title": "二", "url": "https://example.com/2"},
+    ])
+    db = DatabaseManager(database_url)
+    assert len(db.url_index) == 2
+    assert db.essay_exists("https://example.com/1")
+    assert not db.essay_exists("https://example.com/3")
+    assert db.url_index.stats()["definitely_new"] == 1
+
+
+def test_normalized_urls_dedupe(database_url):
+    db = DatabaseManager(database_url, normalize_urls=True)
+    assert db.add_essays_bulk([
+        {"title": "一", "url": "https://Example.com/post/"},
+        {"title": "一", "url": "https://example.com/post?utm_medium=feed"},
+    ]) == [True, False]
+    assert db.get_essay_by_url("HTTPS://EXAMPLE.COM/post").url == "https://example.com/post"
+
+
+def test_stale_url_index_skips_duplicates(db, database_url):
+    other = DatabaseManager(database_url, compress_content=db.compress_content)
+    assert other.add_essay(title="标题", url="https://example.com/1", content="正文")
+
+    # db 的URL索引不知道 other 插入的URL
+    assert not db.add_essay(title="标题", url="https://example.com/1", content="另一篇正文")
+    assert db.add_essays_bulk([
+        {"title": "标题", "url": "https://example.com/1"},
+        {"title": "标题", "url": "https://example.com/2"},
+    ]) == [False, True]
+    assert db.essay_exists("https://example.com/1")
+    assert db.get_essay_by_url("https://example.com/1").content == "正文"
+    other.engine.dispose()
+
+
+def test_normalized_lookup_falls_back_to_stored_url(database_url):
+    url = "HTTPS://Example.com/post/?utm_source=feed"
+    DatabaseManager(database_url).add_essay(title="标题", url=url, content="旧正文")
+
+    db = DatabaseManager(database_url, normalize_urls=True)
+    assert db.essay_exists(url)
+    assert not db.add_essay(title="标题", url=url)
+    assert db.update_essay_content(url, "新正文")
+    assert db.get_essay_by_url(url).content == "新正文"